@@ -8,6 +8,8 @@ from dotenv import load_dotenv
 from openai import OpenAI
 from nltk.stem.porter import PorterStemmer
 
+from medical_patterns import COMMON_CONDITION_MATCHER, TermMatcher, find_common_conditions, find_suffix_terms
+
 # Load environment variables
 load_dotenv()
 
@@ -66,6 +68,9 @@ MEDICAL_TERMS_FALLBACK = {
     "copd": "Chronic Obstructive Pulmonary Disease; a group of lung diseases that block airflow and make breathing difficult."
 }
 
+# The fallback terms, found with a single scan of the text
+FALLBACK_TERM_MATCHER = TermMatcher(MEDICAL_TERMS_FALLBACK)
+
 # Fallback precautions for common conditions when AI is unavailable
 CONDITION_PRECAUTIONS_FALLBACK = {
     "diabetes": [
@@ -401,43 +406,27 @@ def generate_basic_explanation(term: str) -> str:
     # Last resort
     return f"A medical term or condition used in healthcare."
 
-def identify_complex_terms(text: str) -> List[str]:
+def identify_complex_terms(text: str, context=None) -> List[str]:
     """
     Use AI to identify complex medical terms in the text
     Falls back to pattern matching when API is unavailable
+    Pattern matching reuses the document's simplifier.AnalysisContext if given
     """
     results = []
     
     # Always try pattern matching first for reliability
     try:
         # Extract terms based on common medical patterns
-        patterns = [
-            r'\b\w+itis\b',  # inflammation
-            r'\b\w+emia\b',   # blood condition
-            r'\b\w+pathy\b',  # disease
-            r'\b\w+ectomy\b', # surgical removal
-            r'\b\w+plasty\b', # surgical repair
-            r'\b\w+scopy\b',  # visual examination
-            r'\b\w+tomy\b',   # surgical incision
-            r'\b\w+gram\b',   # diagnostic image
-            r'\b\w+megaly\b', # enlargement
-            r'\b\w+trophy\b', # growth/development
-            r'\b\w+osis\b',   # condition/disease
-            r'\b\w+algia\b',  # pain
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text.lower())
-            for match in matches:
-                if match not in results and len(match) > 5:  # Avoid short terms
-                    results.append(match)
+        suffix_terms = context.suffix_terms if context is not None else find_suffix_terms(text)
+        for match in suffix_terms:
+            if match not in results:
+                results.append(match)
         
         # Check for known medical terms
-        for term in MEDICAL_TERMS_FALLBACK.keys():
-            pattern = r'\b' + re.escape(term) + r'\b'
-            if re.search(pattern, text.lower()):
-                if term not in results:
-                    results.append(term)
+        lowered = context.lowered if context is not None else text.lower()
+        for term in FALLBACK_TERM_MATCHER.find(lowered):
+            if term not in results:
+                results.append(term)
     except Exception as e:
         logger.warning(f"Error in pattern matching: {e}")
     
@@ -508,46 +497,24 @@ Do not include common words that laypeople would understand."""
     
     return results
 
-def identify_medical_conditions(text: str) -> List[str]:
+def identify_medical_conditions(text: str, context=None) -> List[str]:
     """
     Use AI to identify medical conditions mentioned in the text
     Falls back to pattern matching when API is unavailable
+    Pattern matching reuses the document's simplifier.AnalysisContext if given
     """
     conditions = []
     
     # Always do pattern matching first
     try:
-        # Common medical conditions to detect in reports
-        common_conditions = [
-            "diabetes", "hypertension", "asthma", "arthritis", "heart disease", 
-            "thyroid disorder", "pneumonia", "covid-19", "high blood pressure",
-            "coronary artery disease", "copd", "chronic obstructive pulmonary disease",
-            "cancer", "kidney disease", "liver disease", "stroke", "anemia",
-            "gastroesophageal reflux disease", "gerd", "depression", "anxiety",
-            "alzheimer's", "parkinson's", "multiple sclerosis", "osteoporosis",
-            "hypertension", "hyperlipidemia", "obesity", "osteoarthritis", 
-            "rheumatoid arthritis", "hypothyroidism", "hyperthyroidism", 
-            "chronic kidney disease", "cirrhosis", "hepatitis", "heart failure", 
-            "atrial fibrillation", "coronary artery disease", "peripheral artery disease", 
-            "chronic venous insufficiency", "deep vein thrombosis", "pulmonary embolism",
-            "sleep apnea", "chronic bronchitis", "emphysema", "asthma", "pneumonia",
-            "tuberculosis", "migraine", "epilepsy", "parkinson's disease", "dementia",
-            "glaucoma", "cataracts", "macular degeneration", "hearing loss", "meniere's disease", 
-            "gastritis", "peptic ulcer disease", "crohn's disease", "ulcerative colitis", 
-            "irritable bowel syndrome", "diverticulosis", "diverticulitis", "hemorrhoids",
-            "gallstones", "urinary incontinence", "benign prostatic hyperplasia", 
-            "erectile dysfunction", "osteopenia", "gout", "lupus", "fibromyalgia", 
-            "psoriasis", "eczema", "rosacea", "melanoma", "basal cell carcinoma", 
-            "breast cancer", "prostate cancer", "colorectal cancer", "lung cancer", 
-            "leukemia", "lymphoma", "multiple myeloma", "depression", "anxiety disorder", 
-            "bipolar disorder", "post-traumatic stress disorder"
-        ]
-        
+        # Common medical conditions to detect in reports, found in one scan
+        if context is not None:
+            common_conditions = context.terms(COMMON_CONDITION_MATCHER)
+        else:
+            common_conditions = find_common_conditions(text)
         for condition in common_conditions:
-            pattern = r'\b' + re.escape(condition) + r'\b'
-            if re.search(pattern, text.lower()):
-                if condition not in conditions:
-                    conditions.append(condition)
+            if condition not in conditions:
+                conditions.append(condition)
     except Exception as e:
         logger.warning(f"Error in condition pattern matching: {e}")
     
@@ -1,15 +1,35 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pdf_extractor import extract_pdf_text
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:
+    # python-multipart releases before 0.0.13 ship the module as `multipart`
+    from multipart.multipart import MultipartParser, parse_options_header
+from contextlib import asynccontextmanager
+from pdf_extractor import iter_pdf_pages
 from ocr_extractor import extract_image_text
-from summarizer import summarize_text
-from simplifier import simplify_text, generate_precautions
+from document import ExtractedDocument, ExtractionError
+from lab_extractor import parse_lab_tables
+from summarizer import (
+    summarize_async, iter_summary, start_background_load, model_status,
+    start_batcher, stop_batcher, batcher_stats
+)
+from report_cache import ReportCache
+from medical_patterns import CONDITION_MATCHER, COMPLEX_TERM_MATCHER
+from simplifier import (
+    simplify_pages, annotate_text, render_inline, build_precautions, AnalysisContext,
+    PRECAUTION_CONDITION_MATCHER
+)
 from pydantic import BaseModel
-import io
+from collections import OrderedDict
 import uuid
 import os
+import hashlib
+import tempfile
+import time
 import logging
-import re
 from dotenv import load_dotenv
 import json
 
@@ -30,7 +50,17 @@ else:
     if not api_key.startswith(('sk-', 'sk-proj-')):
         logger.warning("⚠️ OPENAI_API_KEY does not appear to be in the correct format. Check your .env file.")
         
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the summarization model in the background so the server can bind its
+    # port immediately; /ready reports when the model can serve requests
+    start_background_load()
+    # Chunks from concurrent uploads are summarized together in micro-batches
+    start_batcher()
+    yield
+    await stop_batcher()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware to allow frontend to communicate with backend
 app.add_middleware(
@@ -44,52 +74,40 @@ app.add_middleware(
 # In-memory storage for processed reports
 report_storage = {}
 
-# Additional common medical conditions to detect in reports
-# (will be used as fallback if simplifier.py doesn't detect any conditions)
-MEDICAL_CONDITIONS = [
-    "diabetes", "hypertension", "asthma", "arthritis", "heart disease", 
-    "thyroid disorder", "pneumonia", "covid-19", "high blood pressure",
-    "coronary artery disease", "copd", "chronic obstructive pulmonary disease",
-    "cancer", "kidney disease", "liver disease", "stroke", "anemia",
-    "gastroesophageal reflux disease", "gerd", "depression", "anxiety",
-    "alzheimer's", "parkinson's", "multiple sclerosis", "osteoporosis"
-]
-
-# Common complex medical terms for extraction
-COMPLEX_MEDICAL_TERMS = [
-    "hypertension", "hyperlipidemia", "dyspnea", "myocardial infarction", 
-    "cerebrovascular accident", "atherosclerosis", "arrhythmia", "tachycardia", 
-    "bradycardia", "nephropathy", "neuropathy", "retinopathy", "gastroparesis",
-    "arthralgia", "myalgia", "edema", "syncope", "vertigo", "pruritus",
-    "dysphagia", "hemoptysis", "hematuria", "jaundice", "cirrhosis", "hepatomegaly",
-    "splenomegaly", "thrombocytopenia", "anemia", "leukocytosis", "neutropenia",
-    "hyperglycemia", "hypoglycemia", "hypercholesterolemia", "hyperkalemia", "hyponatremia",
-    "hypernatremia", "azotemia", "uremia", "encephalopathy", "cerebral infarction",
-    "transient ischemic attack", "paresthesia", "dysarthria", "dyslexia", "aphasia",
-    "ataxia", "dyskinesia", "hyperreflexia", "hyporeflexia", "nystagmus"
-]
-
-def detect_medical_conditions(text):
+# Uploads larger than this are rejected while they are being received
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024)))
+
+# Form fields sent alongside the file may be at most this size
+UPLOAD_MAX_FIELD_BYTES = 64 * 1024
+
+# Room for multipart boundaries, part headers and form fields when checking
+# an upload's Content-Length against MAX_UPLOAD_BYTES
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# Upload results keyed by the SHA-256 of the file, so re-uploads skip the pipeline
+report_cache = ReportCache()
+
+# Upload responses of streamed reports, keyed by report ID, waiting for their
+# summary before they are cached as (cache key, response). Kept apart from
+# report_storage so they are never returned by /report/{report_id}
+pending_cache_entries = OrderedDict()
+
+# Oldest pending entries are dropped beyond this, for streams never opened
+PENDING_CACHE_MAX_ENTRIES = 256
+
+def detect_medical_conditions(context):
     """
-    Fallback detection of medical conditions mentioned in the text
-    Returns the most likely condition found
+    Fallback detection of medical conditions mentioned in the document
+    Returns the most likely condition found, using the condition counts of its
+    AnalysisContext
     """
-    text = text.lower()
-    found_conditions = []
-    
-    for condition in MEDICAL_CONDITIONS:
-        # Look for the condition as a whole word
-        pattern = r'\b' + re.escape(condition) + r'\b'
-        if re.search(pattern, text):
-            found_conditions.append(condition)
+    # Whole-word occurrences of each condition that appears in the text
+    condition_counts = {
+        condition: context.term_counts[condition] for condition in context.terms(CONDITION_MATCHER)
+    }
     
     # Simple heuristic - return the condition that appears most frequently
-    if found_conditions:
-        condition_counts = {}
-        for condition in found_conditions:
-            pattern = r'\b' + re.escape(condition) + r'\b'
-            condition_counts[condition] = len(re.findall(pattern, text))
-        
+    if condition_counts:
         # Return the condition with the highest count
         return max(condition_counts, key=condition_counts.get)
     
@@ -104,42 +122,24 @@ class TextRequest(BaseModel):
 async def extract_complex_terms(request: TextRequest):
     """Extract complex medical terms from the provided text"""
     try:
-        text = request.text.lower()
+        # The text is scanned once for every detector below
+        context = AnalysisContext(request.text)
+        text = context.lowered
         extracted_terms = []
         
-        # Method 1: Use regex to find complex terms from our predefined list
-        for term in COMPLEX_MEDICAL_TERMS:
-            pattern = r'\b' + re.escape(term) + r'\b'
-            if re.search(pattern, text):
-                if term not in extracted_terms:
-                    extracted_terms.append(term)
-        
-        # Method 2: Use regex patterns to find additional medical terminology
-        # Pattern for medical terms with prefixes/suffixes common in medicine
-        patterns = [
-            r'\b\w+itis\b',  # inflammation
-            r'\b\w+emia\b',   # blood condition
-            r'\b\w+pathy\b',  # disease
-            r'\b\w+ectomy\b', # surgical removal
-            r'\b\w+plasty\b', # surgical repair
-            r'\b\w+scopy\b',  # visual examination
-            r'\b\w+tomy\b',   # surgical incision
-            r'\b\w+gram\b',   # diagnostic image
-            r'\b\w+megaly\b', # enlargement
-            r'\b\w+trophy\b', # growth/development
-            r'\b\w+osis\b',   # condition/disease
-            r'\b\w+algia\b',  # pain
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                if match not in extracted_terms and len(match) > 5:  # Avoid short terms
-                    extracted_terms.append(match)
+        # Method 1: Complex terms from our predefined list
+        for term in context.terms(COMPLEX_TERM_MATCHER):
+            if term not in extracted_terms:
+                extracted_terms.append(term)
+        
+        # Method 2: Additional terminology with the suffixes common in medicine
+        for match in context.suffix_terms:
+            if match not in extracted_terms:
+                extracted_terms.append(match)
         
         # Method 3: Use AI explainer to identify additional complex terms
         from ai_medical_explainer import identify_complex_terms
-        ai_terms = identify_complex_terms(text)
+        ai_terms = identify_complex_terms(text, context)
         for term in ai_terms:
             if term not in extracted_terms:
                 extracted_terms.append(term)
@@ -161,29 +161,25 @@ async def detect_diseases(request: TextRequest):
     """Detect diseases in the text and provide AI-generated precautions"""
     try:
         text = request.text
+        # The text is scanned once for every detector below
+        context = AnalysisContext(text)
         
-        # Method 1: Use regex to find diseases from our predefined list
-        detected_diseases = []
-        for condition in MEDICAL_CONDITIONS:
-            pattern = r'\b' + re.escape(condition) + r'\b'
-            if re.search(pattern, text.lower()):
-                if condition not in detected_diseases:
-                    detected_diseases.append(condition)
+        # Method 1: Find diseases from our predefined list
+        detected_diseases = context.terms(CONDITION_MATCHER)
         
-        # Method 2: Use simplifier.py's function if available
+        # Method 2: Use the conditions simplifier.py has precautions for
         try:
-            from simplifier import extract_conditions_from_text
-            additional_conditions = extract_conditions_from_text(text)
+            additional_conditions = context.terms(PRECAUTION_CONDITION_MATCHER)
             for condition in additional_conditions:
                 if condition not in detected_diseases:
                     detected_diseases.append(condition)
         except Exception as e:
-            logger.warning(f"Error using simplifier's extract_conditions: {e}")
+            logger.warning(f"Error using simplifier's precaution conditions: {e}")
         
         # Method 3: Use AI medical explainer to identify conditions
         try:
             from ai_medical_explainer import identify_medical_conditions
-            ai_conditions = identify_medical_conditions(text)
+            ai_conditions = identify_medical_conditions(text, context)
             for condition in ai_conditions:
                 if condition not in detected_diseases:
                     detected_diseases.append(condition)
@@ -201,8 +197,7 @@ async def detect_diseases(request: TextRequest):
                 
                 # Fallback to simplifier.py precautions if available
                 try:
-                    from simplifier import generate_precautions
-                    prec_list, risks, condition = generate_precautions(text)
+                    prec_list, risks, condition = build_precautions(context)
                     precautions = prec_list
                 except Exception as inner_e:
                     logger.warning(f"Error using simplifier precautions: {inner_e}")
@@ -226,44 +221,239 @@ async def detect_diseases(request: TextRequest):
         logger.error(f"Error detecting diseases: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error detecting diseases: {str(e)}")
 
-@app.post("/upload/")
-async def upload_file(file: UploadFile = File(...)):
-    """Process uploaded medical reports (PDF or image)"""
+def analyze_pages(pages, source_type, timings=None, simplify=True):
+    """
+    Run simplification page by page, so that early pages are processed while
+    later ones are still being extracted, then build the AnalysisContext every
+    detector reads from the whole document.
+    `pages` yields PageText tuples; the assembled ExtractedDocument is returned
+    as (document, simplified_text, unknown_terms, context).
+    With simplify=False no simplified text is built (None, []).
+    """
+    started = time.perf_counter()
+    page_texts = []
+    tables = []
+    
+    def consume():
+        for page in pages:
+            page_texts.append(page.text)
+            tables.extend((page.number, rows) for rows in page.tables)
+            yield page.text
+    
+    if simplify:
+        simplified_text, unknown_terms = simplify_pages(consume())
+    else:
+        for _ in consume():
+            pass
+        simplified_text, unknown_terms = None, []
+    
+    timings = dict(timings or {})
+    document = ExtractedDocument.from_pages(page_texts, source_type, timings, tables)
+    context = AnalysisContext(document.text)
+    document.timings["extract_and_analyze"] = time.perf_counter() - started
+    return document, simplified_text, unknown_terms, context
+
+def form_flag(value):
+    """Read a boolean form field the way FastAPI parses bool Form parameters"""
+    return value is not None and value.strip().lower() in ("1", "true", "on", "yes")
+
+async def receive_upload(request: Request):
+    """
+    Parse a multipart upload straight from the request body, streaming the
+    file part into a single temporary file while hashing it and enforcing
+    MAX_UPLOAD_BYTES, so the file is never held in memory or spooled twice.
+    Oversized bodies are rejected from their Content-Length before any of
+    them is read, and unsupported file types as soon as the part headers arrive.
+    Returns (filename, path, sha256 hex digest, other form fields); the caller
+    must delete the file.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload.")
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"File too large. The maximum upload size is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD:
+        raise too_large
+    
+    digest = hashlib.sha256()
+    fields = {}
+    upload = {"filename": None, "path": None, "spool": None, "size": 0}
+    part = {}
+    pending = []
+    
+    def on_part_begin():
+        part.clear()
+        part.update(header=b"", value=b"", disposition=b"", data=bytearray(), is_file=False)
+    
+    def on_header_field(data, start, end):
+        part["header"] += data[start:end]
+    
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+    
+    def on_header_end():
+        if part["header"].lower() == b"content-disposition":
+            part["disposition"] = part["value"]
+        part["header"], part["value"] = b"", b""
+    
+    def on_headers_finished():
+        _, options = parse_options_header(part["disposition"])
+        part["name"] = options.get(b"name", b"").decode("utf-8", "replace")
+        if part["name"] != "file" or b"filename" not in options:
+            return
+        if upload["path"] is not None:
+            raise HTTPException(status_code=400, detail="Upload one file at a time.")
+        filename = options[b"filename"].decode("utf-8", "replace")
+        if not filename.lower().endswith((".pdf", ".png", ".jpg", ".jpeg")):
+            logger.warning(f"Unsupported file format: {filename}")
+            raise HTTPException(status_code=400, detail="Unsupported file format. Please upload PDF or image files.")
+        suffix = os.path.splitext(filename)[1].lower()
+        fd, path = tempfile.mkstemp(prefix="upload-", suffix=suffix)
+        upload.update(filename=filename, path=path, spool=os.fdopen(fd, "wb"))
+        part["is_file"] = True
+    
+    def on_part_data(data, start, end):
+        if part["is_file"]:
+            upload["size"] += end - start
+            if upload["size"] > MAX_UPLOAD_BYTES:
+                raise too_large
+            pending.append(data[start:end])
+        else:
+            part["data"] += data[start:end]
+            if len(part["data"]) > UPLOAD_MAX_FIELD_BYTES:
+                raise HTTPException(status_code=400, detail="Form field too large.")
+    
+    def on_part_end():
+        if not part["is_file"]:
+            fields[part["name"]] = part["data"].decode("utf-8", "replace")
+    
+    def flush():
+        chunk = b"".join(pending)
+        pending.clear()
+        digest.update(chunk)
+        upload["spool"].write(chunk)
+    
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if pending:
+                # Hashing and disk writes run off the event loop
+                await run_in_threadpool(flush)
+        parser.finalize()
+    except BaseException:
+        if upload["spool"] is not None:
+            upload["spool"].close()
+            os.unlink(upload["path"])
+        raise
+    if upload["path"] is None:
+        raise HTTPException(status_code=400, detail="No file uploaded.")
+    upload["spool"].close()
+    return upload["filename"], upload["path"], digest.hexdigest(), fields
+
+@app.post("/upload/", openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object",
+    "required": ["file"],
+    "properties": {
+        "file": {"type": "string", "format": "binary"},
+        "stream_summary": {"type": "boolean", "default": False},
+        "annotate": {"type": "boolean", "default": False},
+    },
+}}}}})
+async def upload_file(request: Request):
+    """
+    Process uploaded medical reports (PDF or image), sent as multipart form
+    data with a `file` part and optional `stream_summary` and `annotate` flags.
+    With stream_summary, the summary is left out of the response and streamed
+    from /summary-stream/{report_id} instead.
+    With annotate, the full original text is returned once with the medical
+    terms as (start, end, term_id) spans and a definitions table, instead of
+    the rewritten simplified text.
+    """
     try:
+        # The body is parsed here rather than by FastAPI, so the file goes to
+        # disk once and oversized uploads are cut off while they arrive
+        original_filename, path, file_hash, fields = await receive_upload(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Upload processing error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    filename = original_filename.lower()
+    stream_summary = form_flag(fields.get("stream_summary"))
+    annotate = form_flag(fields.get("annotate"))
+    
+    try:
+        # Identical files return the stored analysis without re-processing;
+        # annotated responses have a different shape, so they're cached apart
+        cache_key = f"{file_hash}:annotate" if annotate else file_hash
+        cached = report_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Returning cached analysis for {original_filename} ({file_hash[:12]})")
+            return cached
+        
         # Generate unique ID for this report
         report_id = str(uuid.uuid4())
         
-        # Read file content
-        content = await file.read()
-        
-        # Process based on file type
-        if file.filename.lower().endswith(".pdf"):
-            logger.info(f"Processing PDF file: {file.filename}")
-            text = extract_pdf_text(content)
-        elif file.filename.lower().endswith((".png", ".jpg", ".jpeg")):
-            logger.info(f"Processing image file: {file.filename}")
-            text = extract_image_text(content)
+        # Extraction, OCR and analysis are CPU-bound, so they run on worker
+        # threads to keep the event loop serving other requests
+        if filename.endswith(".pdf"):
+            logger.info(f"Processing PDF file: {original_filename}")
+            pages = await run_in_threadpool(iter_pdf_pages, path)
+            source_type, timings = "pdf", {}
         else:
-            logger.warning(f"Unsupported file format: {file.filename}")
-            raise HTTPException(status_code=400, detail="Unsupported file format. Please upload PDF or image files.")
-        
-        if not text or text.startswith("Error"):
-            logger.error(f"Text extraction failed: {text}")
+            logger.info(f"Processing image file: {original_filename}")
+            image_document = await run_in_threadpool(extract_image_text, path)
+            pages = image_document.iter_pages()
+            source_type, timings = "image", image_document.timings
+        
+        logger.info("Simplifying text and detecting conditions...")
+        document, simplified_text, unknown_terms, context = await run_in_threadpool(
+            analyze_pages, pages, source_type, timings, simplify=not annotate
+        )
+        
+        if document.is_empty():
+            logger.error("Text extraction failed: no text content found")
             raise HTTPException(status_code=500, detail="Failed to extract text from the file.")
+        text = document.text
         
-        # Process the extracted text
-        logger.info("Generating summary...")
-        summary = summarize_text(text)
+        annotations = None
+        if annotate:
+            annotations = await run_in_threadpool(annotate_text, text)
+            unknown_terms = annotations.pop("unknown_terms")
         
-        logger.info("Simplifying text...")
-        simplified_text, unknown_terms = simplify_text(text)
+        # Process the extracted text
+        summary, summary_engine, summary_stream = None, None, None
+        if stream_summary:
+            # The client fetches the summary token by token from the stream endpoint
+            summary_stream = f"/summary-stream/{report_id}"
+        else:
+            logger.info("Generating summary...")
+            started = time.perf_counter()
+            # Batched with the chunks of concurrent uploads, off the event loop
+            summary, summary_engine = await summarize_async(text)
+            document.timings["summarize"] = time.perf_counter() - started
         
-        logger.info("Generating precautions and detecting conditions...")
-        precautions_list, risks, detected_condition = generate_precautions(text)
+        logger.info("Generating precautions...")
+        precautions_list, risks, detected_condition = await run_in_threadpool(build_precautions, context)
         
         # If no condition detected from primary method, try fallback
         if not detected_condition:
-            detected_condition = detect_medical_conditions(text)
+            detected_condition = await run_in_threadpool(detect_medical_conditions, context)
+        
+        # Lab values from the report's tables, flagged against their reference ranges
+        lab_results = (await run_in_threadpool(parse_lab_tables, document.tables)).to_records()
         
         # Convert precautions list to string for easier display
         precautions = "\n".join(precautions_list) if precautions_list else "Follow your doctor's recommendations."
@@ -272,28 +462,112 @@ async def upload_file(file: UploadFile = File(...)):
         # Store the processed text
         report_storage[report_id] = {
             "text": text,
+            "document": document,
             "summary": summary,
+            "summary_engine": summary_engine,
             "simplified": simplified_text,
+            "annotations": annotations,
             "unknown_terms": unknown_terms,
             "precautions": precautions,
             "risks": risks_text,
-            "detected_condition": detected_condition
+            "detected_condition": detected_condition,
+            "lab_results": lab_results
         }
         
         # Return processed data
-        return {
+        result = {
             "report_id": report_id,
-            "original_text": text[:1000] + "..." if len(text) > 1000 else text,  # Preview of original text
+            # The annotation spans index the full text; otherwise a preview is enough
+            "original_text": text if annotate else (text[:1000] + "..." if len(text) > 1000 else text),
             "summary": summary,
+            "summary_engine": summary_engine,
+            "summary_stream": summary_stream,
             "simplified": simplified_text,
+            "annotations": annotations,
             "precautions": precautions,
             "risks": risks_text,
             "unknown_terms": unknown_terms,
-            "detected_condition": detected_condition
+            "detected_condition": detected_condition,
+            "lab_results": lab_results
         }
+        # Only cache model summaries; a fallback summary (model loading or
+        # overloaded) should be replaced by a proper one on the next upload.
+        # A streamed summary is cached by the stream once it completes
+        if summary_engine == "abstractive":
+            report_cache.put(cache_key, result)
+        elif stream_summary:
+            pending_cache_entries[report_id] = (cache_key, result)
+            while len(pending_cache_entries) > PENDING_CACHE_MAX_ENTRIES:
+                pending_cache_entries.popitem(last=False)
+        return result
+    except HTTPException:
+        raise
+    except ExtractionError as e:
+        logger.error(f"Text extraction failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to extract text from the file.")
     except Exception as e:
         logger.error(f"Upload processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+    finally:
+        os.unlink(path)
+
+def sse_event(event, data):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/summary-stream/{report_id}")
+async def stream_report_summary(report_id: str, request: Request):
+    """
+    Stream a report's summary as server-sent events while it is generated:
+    "token" events carry pieces of text, then a "done" event carries the full
+    summary and its engine (or a "failed" event if generation broke off).
+    A summary that already exists is sent as a single token.
+    Generation stops when the client disconnects.
+    """
+    if report_id not in report_storage:
+        raise HTTPException(status_code=404, detail="Report not found")
+    report = report_storage[report_id]
+    
+    async def events():
+        if report.get("summary") is not None:
+            yield sse_event("token", {"text": report["summary"]})
+            yield sse_event("done", {"summary": report["summary"], "summary_engine": report.get("summary_engine")})
+            return
+        
+        # Taken now so the entry is released whether or not the stream completes
+        cache_entry = pending_cache_entries.pop(report_id, None)
+        started = time.perf_counter()
+        pieces, engine = [], None
+        summary_pieces = iter_summary(report["text"])
+        try:
+            # Each piece is generated on a worker thread
+            async for piece, engine in iterate_in_threadpool(summary_pieces):
+                if await request.is_disconnected():
+                    logger.info(f"Client disconnected, stopping the summary of report {report_id}")
+                    return
+                pieces.append(piece)
+                yield sse_event("token", {"text": piece})
+        except Exception as e:
+            logger.error(f"Error streaming summary for report {report_id}: {e}")
+            yield sse_event("failed", {"detail": "Summarization failed part way through."})
+            return
+        finally:
+            # Stops the model's generation and frees its stream slot
+            await run_in_threadpool(summary_pieces.close)
+        
+        summary = "".join(pieces)
+        report["summary"], report["summary_engine"] = summary, engine
+        report["document"].timings["summarize"] = time.perf_counter() - started
+        if cache_entry is not None and engine == "abstractive":
+            # Re-uploads of the file now get the finished summary straight away
+            cache_key, result = cache_entry
+            report_cache.put(cache_key, {**result, "summary": summary, "summary_engine": engine, "summary_stream": None})
+        yield sse_event("done", {"summary": summary, "summary_engine": engine})
+    
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 # Get more information about an unknown medical term
 class TermRequest(BaseModel):
@@ -335,7 +609,7 @@ async def chat_with_report(request: ChatRequest):
         # Get the report text if report_id is provided
         report_text = ""
         if report_id and report_id in report_storage:
-            report_text = report_storage[report_id].get("original_text", "")
+            report_text = report_storage[report_id].get("text", "")
         
         # Use AI medical explainer to generate response
         try:
@@ -363,14 +637,39 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 200 once the summarization model is loaded, 503 until then"""
+    # May ask the model server, so off the event loop
+    status = await run_in_threadpool(model_status)
+    ready = status["state"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "summarizer": status, "batcher": batcher_stats()}
+    )
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Hit/miss counters and occupancy of the upload cache"""
+    return report_cache.stats()
+
 # Report summary endpoint
 @app.get("/report/{report_id}")
-async def get_report(report_id: str):
-    """Get a processed report by ID"""
+async def get_report(report_id: str, render_inline_text: bool = False):
+    """
+    Get a processed report by ID. For reports uploaded with annotate,
+    render_inline_text=true also renders the inline simplified text.
+    """
     if report_id not in report_storage:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    return report_storage[report_id]
+    stored = report_storage[report_id]
+    if render_inline_text and stored["simplified"] is None and stored.get("annotations"):
+        stored["simplified"] = render_inline(stored["text"], stored["annotations"])
+    
+    report = dict(stored)
+    report["document"] = report["document"].to_dict()
+    return report
 
 # Add middleware to handle CORS preflight requests
 @app.options("/{rest_of_path:path}")
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Collects items submitted by concurrent requests into micro-batches and runs
+    each batch with one call to `run_batch`, handing every item's result back to
+    the request that submitted it through a future.
+
+    A batch is started as soon as `max_batch_size` items are waiting, or
+    `max_wait_ms` after the first item of the batch arrived. Batches run one at
+    a time on a dedicated worker thread, so the event loop is never blocked and
+    the model never runs two generations at once.
+    """
+
+    def __init__(self, run_batch: Callable[[List], List], max_batch_size: int, max_wait_ms: float,
+                 name: str = "batcher"):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._queue = deque()  # (item, future) pairs waiting for a batch
+        self._wakeup = None
+        self._task = None
+        self._executor = None
+        self._batches = 0
+        self._items = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted items not yet picked up by a batch"""
+        return len(self._queue)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the batching loop on the running event loop"""
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+
+    async def stop(self):
+        """Stop the loop and fail any items still waiting"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue:
+            _, future = self._queue.popleft()
+            if not future.done():
+                future.set_exception(RuntimeError(f"{self.name} stopped"))
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def submit(self, items: List) -> List:
+        """Queue items for batching and wait for all of their results, in order"""
+        if not self.running:
+            raise RuntimeError(f"{self.name} is not running")
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            self._queue.append((item, future))
+            futures.append(future)
+        self._wakeup.set()
+        return list(await asyncio.gather(*futures))
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+        }
+
+    async def _wait_for_items(self, timeout: Optional[float] = None) -> bool:
+        """Wait until new items are submitted; False if the timeout passed first"""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            while not self._queue:
+                await self._wait_for_items()
+
+            # Give concurrent requests up to max_wait to fill the batch
+            deadline = loop.time() + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0 or not await self._wait_for_items(remaining):
+                    break
+
+            batch = []
+            while self._queue and len(batch) < self.max_batch_size:
+                item, future = self._queue.popleft()
+                # Skip items whose request has gone away (e.g. client disconnected)
+                if not future.done():
+                    batch.append((item, future))
+            if not batch:
+                continue
+
+            try:
+                results = await loop.run_in_executor(self._executor, self.run_batch, [item for item, _ in batch])
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"{self.name} stopped"))
+                raise
+            except Exception as e:
+                logger.error(f"Error running batch of {len(batch)} items: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self._batches += 1
+            self._items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
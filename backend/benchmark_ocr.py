@@ -0,0 +1,116 @@
+"""
+Benchmark OCR preprocessing profiles on a sample set.
+
+Each image in the sample directory (png/jpg/jpeg) may have a ground-truth
+transcription next to it with the same name and a .txt extension. For every
+profile in OCR_PROFILES the script reports preprocessing + OCR time, character
+accuracy and how many of the numbers in the ground truth (lab values) were
+recovered.
+
+Usage:
+    python benchmark_ocr.py path/to/samples [--profiles raw fast accurate] [--repeat 1]
+"""
+import argparse
+import os
+import re
+import statistics
+import time
+
+from ocr_extractor import OCR_PROFILES, load_image, ocr_image
+
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+def levenshtein(a, b):
+    """Edit distance between two strings"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+def normalize(text):
+    """Collapse whitespace so layout differences don't count as errors"""
+    return re.sub(r"\s+", " ", text).strip()
+
+def char_accuracy(predicted, expected):
+    """1 - normalized edit distance, clipped to [0, 1]"""
+    predicted, expected = normalize(predicted), normalize(expected)
+    if not expected:
+        return 1.0 if not predicted else 0.0
+    return max(0.0, 1.0 - levenshtein(predicted, expected) / len(expected))
+
+def number_recall(predicted, expected):
+    """Fraction of the numbers in the ground truth that appear in the OCR output"""
+    expected_numbers = NUMBER_PATTERN.findall(expected)
+    if not expected_numbers:
+        return 1.0
+    remaining = NUMBER_PATTERN.findall(predicted)
+    found = 0
+    for number in expected_numbers:
+        if number in remaining:
+            remaining.remove(number)
+            found += 1
+    return found / len(expected_numbers)
+
+def load_samples(directory):
+    """Return (name, image bytes, ground truth or None) for each image in the directory"""
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        if extension.lower() not in (".png", ".jpg", ".jpeg"):
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            content = f.read()
+        truth_path = os.path.join(directory, stem + ".txt")
+        truth = None
+        if os.path.exists(truth_path):
+            with open(truth_path, encoding="utf-8") as f:
+                truth = f.read()
+        samples.append((name, content, truth))
+    return samples
+
+def run_profile(profile, samples, repeat):
+    """OCR every sample with one profile and collect timing and accuracy"""
+    times, accuracies, recalls = [], [], []
+    for name, content, truth in samples:
+        elapsed = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            text = ocr_image(load_image(content, profile))
+            elapsed.append(time.perf_counter() - start)
+        times.append(min(elapsed))
+        if truth is not None:
+            accuracies.append(char_accuracy(text, truth))
+            recalls.append(number_recall(text, truth))
+    return times, accuracies, recalls
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("samples", help="directory of sample images with optional .txt ground truth")
+    parser.add_argument("--profiles", nargs="+", default=list(OCR_PROFILES), choices=list(OCR_PROFILES))
+    parser.add_argument("--repeat", type=int, default=1, help="runs per image; the fastest is reported")
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples)
+    if not samples:
+        parser.error(f"no images found in {args.samples}")
+
+    print(f"{len(samples)} images, {sum(t is not None for _, _, t in samples)} with ground truth\n")
+    print(f"{'profile':<10} {'mean s':>8} {'p50 s':>8} {'max s':>8} {'char acc':>9} {'numbers':>8}")
+    for profile in args.profiles:
+        times, accuracies, recalls = run_profile(profile, samples, args.repeat)
+        accuracy = f"{statistics.mean(accuracies):.3f}" if accuracies else "-"
+        recall = f"{statistics.mean(recalls):.3f}" if recalls else "-"
+        print(f"{profile:<10} {statistics.mean(times):>8.3f} {statistics.median(times):>8.3f} "
+              f"{max(times):>8.3f} {accuracy:>9} {recall:>8}")
+
+if __name__ == "__main__":
+    main()
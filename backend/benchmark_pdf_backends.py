@@ -0,0 +1,104 @@
+"""
+Benchmark the PDF parsing backends on a corpus of PDFs.
+
+For every backend in pdf_backends.BACKENDS the script extracts each PDF
+serially (no process pool, no OCR of image-only pages) and reports pages per
+second, then compares each backend's text with the reference backend's
+(pdfplumber by default) to show how closely the outputs match.
+
+Usage:
+    python benchmark_pdf_backends.py path/to/pdfs [--backends pdfplumber pdfium]
+                                     [--reference pdfplumber] [--repeat 1] [--show-diff 0]
+"""
+import argparse
+import difflib
+import os
+import re
+import statistics
+import time
+
+from pdf_backends import BACKENDS, get_backend
+
+def extract_text_layer(path, backend):
+    """Text layer of every page of a PDF, without OCR or table extraction"""
+    with get_backend(backend)(path) as pdf:
+        texts = []
+        for index in range(pdf.page_count):
+            page = pdf.page(index)
+            texts.append(page.extract_text())
+            page.close()
+        return texts
+
+def normalize(text):
+    """Collapse whitespace so line-wrapping differences don't count as changes"""
+    return re.sub(r"\s+", " ", text).strip()
+
+def similarity(a, b):
+    """Similarity ratio of two texts in [0, 1], compared word by word"""
+    return difflib.SequenceMatcher(None, normalize(a).split(), normalize(b).split(), autojunk=False).ratio()
+
+def time_backend(paths, backend, repeat):
+    """Extract every PDF with one backend; returns per-file (seconds, page texts)"""
+    results = {}
+    for path in paths:
+        elapsed = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            texts = extract_text_layer(path, backend)
+            elapsed.append(time.perf_counter() - start)
+        results[path] = (min(elapsed), texts)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="directory containing PDF files")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--reference", default="pdfplumber", choices=list(BACKENDS),
+                        help="backend whose output the others are compared with")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per file; the fastest is reported")
+    parser.add_argument("--show-diff", type=int, default=0, metavar="N",
+                        help="print a unified diff for the N least similar files per backend")
+    args = parser.parse_args()
+
+    paths = sorted(
+        os.path.join(args.corpus, name) for name in os.listdir(args.corpus) if name.lower().endswith(".pdf")
+    )
+    if not paths:
+        parser.error(f"no PDF files found in {args.corpus}")
+
+    backends = list(dict.fromkeys([args.reference] + args.backends))
+    results = {}
+    for backend in backends:
+        if get_backend(backend).name != backend:
+            print(f"Skipping {backend}: its library is not installed")
+            continue
+        results[backend] = time_backend(paths, backend, args.repeat)
+
+    reference = results.get(args.reference)
+    print(f"{len(paths)} PDFs\n")
+    print(f"{'backend':<12} {'pages':>7} {'seconds':>9} {'pages/s':>9} {'similarity':>11} {'min sim':>8}")
+    for backend, files in results.items():
+        pages = sum(len(texts) for _, texts in files.values())
+        seconds = sum(elapsed for elapsed, _ in files.values())
+        scores = {}
+        if reference is not None:
+            for path, (_, texts) in files.items():
+                scores[path] = similarity("\n".join(reference[path][1]), "\n".join(texts))
+        mean_score = f"{statistics.mean(scores.values()):.4f}" if scores else "-"
+        min_score = f"{min(scores.values()):.4f}" if scores else "-"
+        print(f"{backend:<12} {pages:>7} {seconds:>9.3f} {pages / seconds if seconds else 0:>9.1f} "
+              f"{mean_score:>11} {min_score:>8}")
+
+        if backend != args.reference and args.show_diff and scores:
+            for path in sorted(scores, key=scores.get)[:args.show_diff]:
+                diff = difflib.unified_diff(
+                    "\n".join(reference[path][1]).splitlines(),
+                    "\n".join(files[path][1]).splitlines(),
+                    fromfile=f"{args.reference}:{os.path.basename(path)}",
+                    tofile=f"{backend}:{os.path.basename(path)}",
+                    lineterm="",
+                )
+                print("\n".join(diff) + "\n")
+
+if __name__ == "__main__":
+    main()
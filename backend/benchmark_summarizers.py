@@ -0,0 +1,150 @@
+"""
+Benchmark the supported summarization models and engines on a corpus of
+medical report texts.
+
+Every .txt file in the corpus directory is summarized by each combination of
+model (summarizer.SUMMARIZATION_MODELS) and engine (torch, onnx). A file named
+<name>.summary.txt next to <name>.txt is its reference summary; ROUGE is
+computed over the files that have one. Each configuration runs in a fresh
+process so its peak memory is measured in isolation. The script reports load
+time, peak resident memory, p50/p95 per-report latency and ROUGE-1/2/L F1.
+
+Usage:
+    python benchmark_summarizers.py path/to/texts [--models t5-small sshleifer/distilbart-cnn-6-6]
+                                    [--engines torch onnx] [--repeat 1]
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import summarizer
+
+def tokenize(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def ngrams(tokens, n):
+    counts = {}
+    for i in range(len(tokens) - n + 1):
+        gram = tuple(tokens[i:i + n])
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+def f1(overlap, predicted_total, reference_total):
+    if not overlap or not predicted_total or not reference_total:
+        return 0.0
+    precision, recall = overlap / predicted_total, overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+def rouge_n(predicted, reference, n):
+    """ROUGE-N F1 over lowercased word n-grams"""
+    predicted_grams, reference_grams = ngrams(tokenize(predicted), n), ngrams(tokenize(reference), n)
+    overlap = sum(min(count, reference_grams.get(gram, 0)) for gram, count in predicted_grams.items())
+    return f1(overlap, sum(predicted_grams.values()), sum(reference_grams.values()))
+
+def rouge_l(predicted, reference):
+    """ROUGE-L F1: longest common subsequence of words"""
+    a, b = tokenize(predicted), tokenize(reference)
+    previous = [0] * (len(b) + 1)
+    for word_a in a:
+        current = [0]
+        for j, word_b in enumerate(b, start=1):
+            current.append(previous[j - 1] + 1 if word_a == word_b else max(previous[j], current[j - 1]))
+        previous = current
+    return f1(previous[-1], len(a), len(b))
+
+def load_corpus(directory):
+    """Return (name, text, reference summary or None) for each report text"""
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".txt") or name.endswith(".summary.txt"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            text = f.read()
+        reference_path = os.path.join(directory, name[:-len(".txt")] + ".summary.txt")
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                reference = f.read()
+        corpus.append((name, text, reference))
+    return corpus
+
+def run_config(model_name, engine, corpus, repeat):
+    """
+    Load one model with one engine and summarize the corpus. Runs in its own
+    process; returns stats and summaries by name, or None if the engine or
+    model could not be loaded.
+    """
+    start = time.perf_counter()
+    try:
+        pipeline, used = summarizer.build_pipeline(engine, model_name)
+    except Exception as e:
+        print(f"Could not load {model_name}: {e}")
+        return None
+    load_seconds = time.perf_counter() - start
+    if used != engine:
+        return None
+
+    summarizer.use_pipeline(pipeline, model_name)
+    latencies, summaries = [], {}
+    for name, text, _ in corpus:
+        elapsed = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            summary = summarizer.summarize_chunks(summarizer.prepare_chunks(text))
+            elapsed.append(time.perf_counter() - start)
+        latencies.append(min(elapsed))
+        summaries[name] = summary
+
+    return {
+        "load": load_seconds,
+        # ru_maxrss is in kilobytes on Linux
+        "memory": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "p50": float(np.percentile(latencies, 50)),
+        "p95": float(np.percentile(latencies, 95)),
+    }, summaries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="directory containing report .txt files and .summary.txt references")
+    parser.add_argument("--models", nargs="+", default=list(summarizer.SUMMARIZATION_MODELS),
+                        choices=list(summarizer.SUMMARIZATION_MODELS))
+    parser.add_argument("--engines", nargs="+", default=["torch", "onnx"], choices=["torch", "onnx"])
+    parser.add_argument("--repeat", type=int, default=1, help="runs per file; the fastest is reported")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"no .txt files found in {args.corpus}")
+    references = sum(1 for _, _, reference in corpus if reference is not None)
+
+    print(f"{len(corpus)} reports, {references} with reference summaries\n")
+    print(f"{'model':<32} {'engine':<7} {'load s':>7} {'peak MB':>8} {'p50 s':>7} {'p95 s':>7} "
+          f"{'ROUGE-1':>8} {'ROUGE-2':>8} {'ROUGE-L':>8}")
+    context = multiprocessing.get_context("spawn")
+    for model_name in args.models:
+        for engine in args.engines:
+            # A fresh process per configuration so peak memory isn't shared between them
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_config, model_name, engine, corpus, args.repeat).result()
+            if result is None:
+                print(f"{model_name:<32} {engine:<7} skipped: could not be loaded (see the log)")
+                continue
+            stats, summaries = result
+            scores = [
+                (rouge_n(summaries[name], reference, 1), rouge_n(summaries[name], reference, 2),
+                 rouge_l(summaries[name], reference))
+                for name, _, reference in corpus if reference is not None
+            ]
+            rouge = [f"{statistics.mean(column):.4f}" for column in zip(*scores)] if scores else ["-"] * 3
+            print(f"{model_name:<32} {engine:<7} {stats['load']:>7.1f} {stats['memory']:>8.0f} "
+                  f"{stats['p50']:>7.2f} {stats['p95']:>7.2f} {rouge[0]:>8} {rouge[1]:>8} {rouge[2]:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Separator placed between pages when they are joined into one document
+PAGE_SEPARATOR = "\n\n"
+
+class ExtractionError(Exception):
+    """Raised when no text can be extracted from an uploaded file"""
+
+class PageText(NamedTuple):
+    """Text of a single page and its position in the joined document"""
+    number: int  # 1-based page number
+    text: str
+    start: int  # character offset of the page in the joined document text
+    end: int
+    tables: tuple = ()  # raw table rows found on the page
+
+class ExtractedDocument:
+    """
+    Extracted text of a report held as one text buffer, with the span of each
+    page stored as offsets into it so stages can work on page ranges without
+    copying the text
+    """
+    __slots__ = ("text", "page_starts", "page_ends", "source_type", "timings", "tables")
+
+    def __init__(self, text: str, page_starts: Iterable[int], page_ends: Iterable[int],
+                 source_type: str, timings: Optional[Dict[str, float]] = None,
+                 tables: Optional[List[Tuple[int, list]]] = None):
+        self.text = text
+        self.page_starts = array("l", page_starts)
+        self.page_ends = array("l", page_ends)
+        self.source_type = source_type  # "pdf" or "image"
+        self.timings = timings if timings is not None else {}
+        self.tables = tables if tables is not None else []  # (page number, rows) per table
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[str], source_type: str,
+                   timings: Optional[Dict[str, float]] = None,
+                   tables: Optional[List[Tuple[int, list]]] = None) -> "ExtractedDocument":
+        """Join page texts with PAGE_SEPARATOR, trimming the document's outer whitespace"""
+        page_texts = list(pages)
+        starts, ends = [], []
+        offset = 0
+        for text in page_texts:
+            starts.append(offset)
+            ends.append(offset + len(text))
+            offset += len(text) + len(PAGE_SEPARATOR)
+        joined = PAGE_SEPARATOR.join(page_texts)
+
+        # Strip the document as a whole and shift the page spans to match
+        text = joined.strip()
+        lead = len(joined) - len(joined.lstrip())
+        length = len(text)
+        starts = [min(max(start - lead, 0), length) for start in starts]
+        ends = [min(max(end - lead, 0), length) for end in ends]
+        return cls(text, starts, ends, source_type, timings, tables)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_starts)
+
+    def is_empty(self) -> bool:
+        return not self.text
+
+    def page_span(self, index: int) -> Tuple[int, int]:
+        """(start, end) offsets of the page at a 0-based index"""
+        return self.page_starts[index], self.page_ends[index]
+
+    def page_text(self, index: int) -> str:
+        """Text of the page at a 0-based index"""
+        return self.text[self.page_starts[index]:self.page_ends[index]]
+
+    def iter_pages(self, start: int = 0, stop: Optional[int] = None) -> Iterator[PageText]:
+        """Yield the pages in [start, stop) lazily, slicing each one only when reached"""
+        if stop is None:
+            stop = self.page_count
+        for index in range(start, stop):
+            page_start, page_end = self.page_starts[index], self.page_ends[index]
+            tables = tuple(rows for number, rows in self.tables if number == index + 1)
+            yield PageText(index + 1, self.text[page_start:page_end], page_start, page_end, tables)
+
+    def page_at(self, offset: int) -> int:
+        """1-based number of the page containing a character offset"""
+        if not self.page_count:
+            return 0
+        return max(bisect_right(self.page_starts, offset), 1)
+
+    def to_dict(self) -> dict:
+        """Page layout and timings without the text, for JSON responses"""
+        return {
+            "source_type": self.source_type,
+            "page_count": self.page_count,
+            "table_count": len(self.tables),
+            "page_spans": [[start, end] for start, end in zip(self.page_starts, self.page_ends)],
+            "timings": self.timings,
+        }
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __str__(self) -> str:
+        return self.text
@@ -0,0 +1,190 @@
+import re
+import logging
+from typing import Callable, List, Optional
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Sentence boundaries used to cut documents into sentences and model-sized chunks
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?;])\s+|\n{2,}')
+
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9'-]+")
+
+# Sentences with fewer words (headers, addresses, page furniture) are never selected
+MIN_SENTENCE_WORDS = 4
+
+# TextRank builds a sentence-by-sentence similarity matrix; above this many
+# sentences, sentences are ranked by similarity to the document centroid instead
+TEXTRANK_MAX_SENTENCES = 1500
+
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_ITERATIONS = 50
+
+# A sentence this similar (TF-IDF cosine) to one already selected repeats it,
+# like a header or disclaimer reworded slightly from page to page, and is skipped
+REDUNDANCY_THRESHOLD = 0.8
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers him his how i if in into is it its itself just me more most my
+no nor not now of off on once only or other our out over own same she should so some such than
+that the their them then there these they this those through to too under until up very was we
+were what when where which while who whom why will with would you your
+""".split())
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into whitespace-normalized sentences"""
+    sentences = [re.sub(r'\s+', ' ', s).strip() for s in SENTENCE_BOUNDARY.split(text)]
+    return [s for s in sentences if s]
+
+def _tfidf(sentences: List[str]):
+    """
+    Sparse TF-IDF matrix of the sentences as COO arrays (rows, columns,
+    weights) with L2-normalized rows, plus the vocabulary size
+    """
+    vocabulary = {}
+    rows, columns = [], []
+    for index, sentence in enumerate(sentences):
+        for word in WORD_PATTERN.findall(sentence.lower()):
+            if word not in STOPWORDS:
+                rows.append(index)
+                columns.append(vocabulary.setdefault(word, len(vocabulary)))
+    n, size = len(sentences), len(vocabulary)
+    if not size:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.float32), 0
+
+    # Collapse repeated (sentence, word) pairs into term counts
+    keys, counts = np.unique(np.array(rows, np.int64) * size + np.array(columns, np.int64), return_counts=True)
+    rows, columns = keys // size, keys % size
+    document_frequency = np.bincount(columns, minlength=size)
+    idf = np.log((1 + n) / (1 + document_frequency)) + 1
+    weights = ((1 + np.log(counts)) * idf[columns]).astype(np.float32)
+    norms = np.sqrt(np.bincount(rows, weights * weights, minlength=n))
+    weights /= norms[rows]
+    return rows, columns, weights, size
+
+def _textrank(rows, columns, weights, n: int, size: int) -> np.ndarray:
+    """PageRank over the cosine-similarity graph of the sentences"""
+    # Words in a single sentence add nothing to any similarity, so drop their columns
+    shared = np.bincount(columns, minlength=size) > 1
+    keep = shared[columns]
+    remap = np.cumsum(shared) - 1
+    matrix = np.zeros((n, int(shared.sum())), np.float32)
+    matrix[rows[keep], remap[columns[keep]]] = weights[keep]
+
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.zeros_like(similarity), where=out_weight > 0)
+
+    scores = np.full(n, 1 / n, np.float32)
+    for _ in range(TEXTRANK_ITERATIONS):
+        updated = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+def _centroid_scores(rows, columns, weights, n: int, size: int) -> np.ndarray:
+    """Cosine-style similarity of each sentence to the mean TF-IDF vector"""
+    centroid = np.bincount(columns, weights, minlength=size) / n
+    return np.bincount(rows, weights * centroid[columns], minlength=n)
+
+def _scores(rows, columns, weights, n: int, size: int) -> np.ndarray:
+    """TextRank scores of the sentences in a TF-IDF matrix, or centroid scores for long documents"""
+    if not size:
+        return np.zeros(n)
+    if n <= TEXTRANK_MAX_SENTENCES:
+        return _textrank(rows, columns, weights, n, size)
+    return _centroid_scores(rows, columns, weights, n, size)
+
+def rank_sentences(sentences: List[str]) -> np.ndarray:
+    """Importance score of every sentence (higher is more central to the document)"""
+    rows, columns, weights, size = _tfidf(sentences)
+    return _scores(rows, columns, weights, len(sentences), size)
+
+def _count_words(sentences: List[str]) -> List[int]:
+    return [len(sentence.split()) for sentence in sentences]
+
+def _distinct_sentences(sentences: List[str]) -> List[int]:
+    """Indexes of the first occurrence of every sentence, ignoring case and whitespace"""
+    seen = set()
+    indexes = []
+    for index, sentence in enumerate(sentences):
+        key = " ".join(sentence.lower().split())
+        if key not in seen:
+            seen.add(key)
+            indexes.append(index)
+    return indexes
+
+def _pick_sentences(sentences: List[str], lengths, budget: int) -> List[int]:
+    """
+    Indexes, in document order, of the highest-ranked sentences whose
+    `lengths` fit in `budget`. Repeated sentences (page headers, disclaimers)
+    are ranked once, as their first occurrence, since copies of a sentence
+    would otherwise rank each other to the top; and in maximal-marginal-relevance
+    fashion a sentence too similar to one already picked is skipped.
+    """
+    distinct = _distinct_sentences(sentences)
+    texts = [sentences[i] for i in distinct]
+    n = len(texts)
+    rows, columns, weights, size = _tfidf(texts)
+    scores = _scores(rows, columns, weights, n, size)
+    word_counts = np.array(_count_words(texts))
+    scores = np.where(word_counts >= MIN_SENTENCE_WORDS, scores, -np.inf)
+
+    # Highest similarity of every sentence to any picked one; TF-IDF rows are
+    # grouped by sentence, so each sentence's entries are one slice
+    max_similarity = np.zeros(n, np.float32)
+    bounds = np.searchsorted(rows, np.arange(n + 1))
+    picked = []
+    used = 0
+    for k in np.argsort(-scores, kind="stable"):
+        if np.isneginf(scores[k]) or used >= budget:
+            break
+        length = lengths[distinct[k]]
+        if used + length > budget or max_similarity[k] >= REDUNDANCY_THRESHOLD:
+            continue
+        picked.append(distinct[k])
+        used += length
+        if size:
+            vector = np.zeros(size, np.float32)
+            vector[columns[bounds[k]:bounds[k + 1]]] = weights[bounds[k]:bounds[k + 1]]
+            np.maximum(max_similarity, np.bincount(rows, weights * vector[columns], minlength=n), out=max_similarity)
+    return sorted(picked)
+
+def select_sentences(text: str, token_budget: int,
+                     count_tokens: Optional[Callable[[List[str]], List[int]]] = None) -> str:
+    """
+    Keep the highest-ranked sentences of the text that fit in `token_budget`,
+    in their original order, without repeats (see _pick_sentences). Text
+    already within the budget is returned unchanged. `count_tokens` maps
+    sentences to their token counts (defaults to word counts).
+    """
+    sentences = split_sentences(text)
+    lengths = np.array((count_tokens or _count_words)(sentences), np.int64)
+    if lengths.sum() <= token_budget:
+        return text
+
+    picked = _pick_sentences(sentences, lengths, token_budget)
+    used = int(lengths[picked].sum())
+
+    logger.info(f"Extractive pre-filter kept {len(picked)} of {len(sentences)} sentences "
+                f"({used} of {int(lengths.sum())} tokens)")
+    return " ".join(sentences[i] for i in picked)
+
+def extractive_summary(text: str, max_sentences: int = 5) -> str:
+    """
+    Summary made of the document's `max_sentences` highest-ranked sentences, in
+    their original order, without repeats (see _pick_sentences). Pure NumPy,
+    fast enough to serve when the abstractive model is unavailable or overloaded.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return ""
+    # Every sentence counts as one against the budget
+    picked = _pick_sentences(sentences, np.ones(len(sentences), np.int64), max_sentences)
+    return " ".join(sentences[i] for i in picked)
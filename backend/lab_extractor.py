@@ -0,0 +1,225 @@
+import re
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from simplifier import medical_dictionary
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Text-aligned tables are only looked for on pages that contain something
+# shaped like a reference range, since that strategy is slower and noisier
+REFERENCE_RANGE_HINT = re.compile(r'\d\s*[-–]\s*\d|[<>≤≥]\s*\d')
+
+TEXT_TABLE_SETTINGS = {"vertical_strategy": "text", "horizontal_strategy": "text"}
+
+NUMBER = r'[-+]?\d+(?:[.,]\d+)?'
+RANGE_PATTERN = re.compile(r'^\s*(' + NUMBER + r')\s*(?:-|–|to)\s*(' + NUMBER + r')\s*$', re.IGNORECASE)
+UPPER_BOUND_PATTERN = re.compile(r'^\s*(?:<|≤|<=|up to|less than)\s*(' + NUMBER + r')\s*$', re.IGNORECASE)
+LOWER_BOUND_PATTERN = re.compile(r'^\s*(?:>|≥|>=|greater than|more than)\s*(' + NUMBER + r')\s*$', re.IGNORECASE)
+VALUE_PATTERN = re.compile(r'^\s*(?:[HL]\s+)?[<>≤≥]?\s*(' + NUMBER + r')\s*(?:[HL*]|\(?(?:high|low)\)?)?\s*$', re.IGNORECASE)
+UNIT_PATTERN = re.compile(r'^[a-zA-Zµμ%/^0-9.×x*\s]+$')
+
+# Header cell keywords used to recognize what each table column holds
+HEADER_KEYWORDS = {
+    "analyte": ("test", "analyte", "component", "parameter", "investigation", "name"),
+    "value": ("result", "value", "observed"),
+    "unit": ("unit", "units"),
+    "reference": ("reference", "range", "normal", "interval", "ref"),
+}
+
+# Common spellings of lab analytes mapped to their medical_dictionary abbreviation
+ANALYTE_ALIASES = {
+    "hemoglobin": "hgb", "haemoglobin": "hgb", "hb": "hgb",
+    "hematocrit": "hct", "haematocrit": "hct", "pcv": "hct",
+    "white blood cell": "wbc", "white blood cells": "wbc", "wbc count": "wbc",
+    "total leukocyte count": "wbc", "tlc": "wbc", "leukocytes": "wbc",
+    "platelet": "plt", "platelets": "plt", "platelet count": "plt",
+    "blood urea nitrogen": "bun", "urea nitrogen": "bun",
+    "gfr": "egfr", "estimated gfr": "egfr",
+    "hba1c": "a1c", "hemoglobin a1c": "a1c", "glycated hemoglobin": "a1c",
+    "sgot": "ast", "aspartate aminotransferase": "ast",
+    "sgpt": "alt", "alanine aminotransferase": "alt",
+    "ldl cholesterol": "ldl", "ldl-c": "ldl", "hdl cholesterol": "hdl", "hdl-c": "hdl",
+    "thyroid stimulating hormone": "tsh",
+    "c-reactive protein": "crp", "c reactive protein": "crp",
+    "prostate specific antigen": "psa",
+    "creatine kinase": "ck", "cpk": "ck",
+    "free t4": "t4", "ft4": "t4", "free t3": "t3", "ft3": "t3",
+}
+
+class LabResults:
+    """Lab table rows held as parallel columns, one entry per analyte row"""
+    __slots__ = ("analytes", "values", "units", "reference_low", "reference_high",
+                 "pages", "terms", "flags")
+
+    def __init__(self, analytes: List[str], values: np.ndarray, units: List[str],
+                 reference_low: np.ndarray, reference_high: np.ndarray, pages: np.ndarray):
+        self.analytes = analytes
+        self.values = values
+        self.units = units
+        self.reference_low = reference_low
+        self.reference_high = reference_high
+        self.pages = pages
+        self.terms = [link_analyte(analyte) for analyte in analytes]
+        self.flags = flag_abnormal(values, reference_low, reference_high)
+
+    def __len__(self) -> int:
+        return len(self.analytes)
+
+    def to_records(self) -> List[Dict]:
+        """Row-oriented view for JSON responses"""
+        def number(value):
+            return None if np.isnan(value) else float(value)
+
+        records = []
+        for i in range(len(self.analytes)):
+            term = self.terms[i]
+            records.append({
+                "analyte": self.analytes[i],
+                "value": number(self.values[i]),
+                "unit": self.units[i],
+                "reference_low": number(self.reference_low[i]),
+                "reference_high": number(self.reference_high[i]),
+                "flag": self.flags[i],
+                "page": int(self.pages[i]),
+                "term": term,
+                "explanation": medical_dictionary.get(term) if term else None,
+            })
+        return records
+
+def flag_abnormal(values: np.ndarray, low: np.ndarray, high: np.ndarray) -> List[str]:
+    """
+    Flag every row against its reference range in one vectorized pass:
+    "H" above the range, "L" below it, "" when normal or not comparable
+    """
+    with np.errstate(invalid="ignore"):
+        above = values > high
+        below = values < low
+    return np.where(above, "H", np.where(below, "L", "")).tolist()
+
+def link_analyte(analyte: str) -> Optional[str]:
+    """Map an analyte name to its medical_dictionary key, if there is one"""
+    name = re.sub(r'\s+', ' ', analyte.lower()).strip(" .:*")
+    name = re.sub(r'\s*\(.*?\)\s*', ' ', name).strip()
+    if name in medical_dictionary:
+        return name
+    if name in ANALYTE_ALIASES:
+        return ANALYTE_ALIASES[name]
+    for token in re.findall(r'[a-z0-9]+', name):
+        if token in medical_dictionary:
+            return token
+        if token in ANALYTE_ALIASES:
+            return ANALYTE_ALIASES[token]
+    return None
+
+def _to_float(text: str) -> float:
+    return float(text.replace(",", "."))
+
+def parse_reference_range(cell: str) -> Tuple[float, float]:
+    """Parse "13.5-17.5", "<5.6" or ">60" into (low, high); missing bounds are NaN"""
+    if not cell:
+        return np.nan, np.nan
+    match = RANGE_PATTERN.match(cell)
+    if match:
+        return _to_float(match.group(1)), _to_float(match.group(2))
+    match = UPPER_BOUND_PATTERN.match(cell)
+    if match:
+        return np.nan, _to_float(match.group(1))
+    match = LOWER_BOUND_PATTERN.match(cell)
+    if match:
+        return _to_float(match.group(1)), np.nan
+    return np.nan, np.nan
+
+def parse_value(cell: str) -> float:
+    """Parse a numeric result such as "10.2", "10.2 L" or "<0.01"; NaN if not numeric"""
+    match = VALUE_PATTERN.match(cell or "")
+    return _to_float(match.group(1)) if match else np.nan
+
+def _header_columns(row: Sequence[str]) -> Optional[Dict[str, int]]:
+    """Recognize a header row and return the column index of each field"""
+    columns = {}
+    for index, cell in enumerate(row):
+        words = set(re.findall(r'[a-z]+', cell.lower()))
+        for field, keywords in HEADER_KEYWORDS.items():
+            if field not in columns and words.intersection(keywords):
+                columns[field] = index
+                break
+    if "analyte" in columns and "value" in columns:
+        return columns
+    return None
+
+def _guess_columns(row: Sequence[str]) -> Optional[Dict[str, int]]:
+    """Infer the columns of a data row when the table has no recognizable header"""
+    columns = {"analyte": 0}
+    for index, cell in enumerate(row[1:], start=1):
+        if not cell:
+            continue
+        if "value" not in columns and not np.isnan(parse_value(cell)):
+            columns["value"] = index
+        elif "reference" not in columns and not np.isnan(parse_reference_range(cell)).all():
+            columns["reference"] = index
+        elif "unit" not in columns and "value" in columns and UNIT_PATTERN.match(cell):
+            columns["unit"] = index
+    return columns if "value" in columns else None
+
+def _clean_row(row: Sequence[Optional[str]]) -> List[str]:
+    return [re.sub(r'\s+', ' ', cell or "").strip() for cell in row]
+
+def parse_lab_tables(tables: Sequence[Tuple[int, Sequence[Sequence[Optional[str]]]]]) -> LabResults:
+    """
+    Turn raw (page_number, rows) tables into columnar lab results. Rows whose
+    result is not numeric (headers, notes, qualitative results) are skipped.
+    """
+    analytes, values, units, lows, highs, pages = [], [], [], [], [], []
+    for page_number, rows in tables:
+        columns = None
+        for raw_row in rows:
+            row = _clean_row(raw_row)
+            if not any(row):
+                continue
+            header = _header_columns(row)
+            if header:
+                columns = header
+                continue
+            row_columns = columns or _guess_columns(row)
+            if not row_columns or row_columns["value"] >= len(row):
+                continue
+            analyte = row[row_columns["analyte"]]
+            value = parse_value(row[row_columns["value"]])
+            if not analyte or np.isnan(value):
+                continue
+            reference = row[row_columns["reference"]] if row_columns.get("reference", len(row)) < len(row) else ""
+            low, high = parse_reference_range(reference)
+            analytes.append(analyte)
+            values.append(value)
+            units.append(row[row_columns["unit"]] if row_columns.get("unit", len(row)) < len(row) else "")
+            lows.append(low)
+            highs.append(high)
+            pages.append(page_number)
+
+    return LabResults(
+        analytes,
+        np.array(values, dtype=np.float64),
+        units,
+        np.array(lows, dtype=np.float64),
+        np.array(highs, dtype=np.float64),
+        np.array(pages, dtype=np.int32),
+    )
+
+def extract_page_tables(page, text: str) -> List[List[List[Optional[str]]]]:
+    """
+    Extract the tables of an open pdfplumber page, reusing its parsed layout.
+    Ruled tables are found first; text-aligned ones only when the page text
+    looks like it holds reference ranges.
+    """
+    try:
+        tables = page.extract_tables()
+        if not tables and REFERENCE_RANGE_HINT.search(text):
+            tables = page.extract_tables(TEXT_TABLE_SETTINGS)
+        return tables
+    except Exception as e:
+        logger.warning(f"Table extraction failed on page {page.page_number}: {e}")
+        return []
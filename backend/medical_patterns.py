@@ -0,0 +1,225 @@
+"""
+Registry of the medical vocabularies and patterns used to detect conditions,
+complex terms and risk factors. Every vocabulary is compiled once, at import,
+into a single combined matcher, so a detector scans the text once instead of
+running one regex search per term. Matchers work on lowercased text, which is
+much faster to scan than with re.IGNORECASE.
+"""
+import re
+from typing import Dict, Iterable, List
+
+# Common medical conditions to detect in reports
+MEDICAL_CONDITIONS = [
+    "diabetes", "hypertension", "asthma", "arthritis", "heart disease",
+    "thyroid disorder", "pneumonia", "covid-19", "high blood pressure",
+    "coronary artery disease", "copd", "chronic obstructive pulmonary disease",
+    "cancer", "kidney disease", "liver disease", "stroke", "anemia",
+    "gastroesophageal reflux disease", "gerd", "depression", "anxiety",
+    "alzheimer's", "parkinson's", "multiple sclerosis", "osteoporosis"
+]
+
+# Common complex medical terms for extraction
+COMPLEX_MEDICAL_TERMS = [
+    "hypertension", "hyperlipidemia", "dyspnea", "myocardial infarction",
+    "cerebrovascular accident", "atherosclerosis", "arrhythmia", "tachycardia",
+    "bradycardia", "nephropathy", "neuropathy", "retinopathy", "gastroparesis",
+    "arthralgia", "myalgia", "edema", "syncope", "vertigo", "pruritus",
+    "dysphagia", "hemoptysis", "hematuria", "jaundice", "cirrhosis", "hepatomegaly",
+    "splenomegaly", "thrombocytopenia", "anemia", "leukocytosis", "neutropenia",
+    "hyperglycemia", "hypoglycemia", "hypercholesterolemia", "hyperkalemia", "hyponatremia",
+    "hypernatremia", "azotemia", "uremia", "encephalopathy", "cerebral infarction",
+    "transient ischemic attack", "paresthesia", "dysarthria", "dyslexia", "aphasia",
+    "ataxia", "dyskinesia", "hyperreflexia", "hyporeflexia", "nystagmus"
+]
+
+# Wider list of conditions recognized before asking the AI explainer
+COMMON_CONDITIONS = [
+    "diabetes", "hypertension", "asthma", "arthritis", "heart disease",
+    "thyroid disorder", "pneumonia", "covid-19", "high blood pressure",
+    "coronary artery disease", "copd", "chronic obstructive pulmonary disease",
+    "cancer", "kidney disease", "liver disease", "stroke", "anemia",
+    "gastroesophageal reflux disease", "gerd", "depression", "anxiety",
+    "alzheimer's", "parkinson's", "multiple sclerosis", "osteoporosis",
+    "hypertension", "hyperlipidemia", "obesity", "osteoarthritis",
+    "rheumatoid arthritis", "hypothyroidism", "hyperthyroidism",
+    "chronic kidney disease", "cirrhosis", "hepatitis", "heart failure",
+    "atrial fibrillation", "coronary artery disease", "peripheral artery disease",
+    "chronic venous insufficiency", "deep vein thrombosis", "pulmonary embolism",
+    "sleep apnea", "chronic bronchitis", "emphysema", "asthma", "pneumonia",
+    "tuberculosis", "migraine", "epilepsy", "parkinson's disease", "dementia",
+    "glaucoma", "cataracts", "macular degeneration", "hearing loss", "meniere's disease",
+    "gastritis", "peptic ulcer disease", "crohn's disease", "ulcerative colitis",
+    "irritable bowel syndrome", "diverticulosis", "diverticulitis", "hemorrhoids",
+    "gallstones", "urinary incontinence", "benign prostatic hyperplasia",
+    "erectile dysfunction", "osteopenia", "gout", "lupus", "fibromyalgia",
+    "psoriasis", "eczema", "rosacea", "melanoma", "basal cell carcinoma",
+    "breast cancer", "prostate cancer", "colorectal cancer", "lung cancer",
+    "leukemia", "lymphoma", "multiple myeloma", "depression", "anxiety disorder",
+    "bipolar disorder", "post-traumatic stress disorder"
+]
+
+# Suffixes common in medical terminology, in order of precedence
+COMPLEX_TERM_SUFFIXES = [
+    "itis",    # inflammation
+    "emia",    # blood condition
+    "pathy",   # disease
+    "ectomy",  # surgical removal
+    "plasty",  # surgical repair
+    "scopy",   # visual examination
+    "tomy",    # surgical incision
+    "gram",    # diagnostic image
+    "megaly",  # enlargement
+    "trophy",  # growth/development
+    "osis",    # condition/disease
+    "algia",   # pain
+]
+
+# Common risk factors that might appear in medical reports (lowercase patterns,
+# matched against lowercased text)
+RISK_PATTERNS = {
+    "smoking": [r"smok(er|ing|es)", r"tobacco use", r"pack[- ]years"],
+    "alcohol": [r"alcohol (use|consumption|abuse)", r"drinks per (day|week)", r"alcoholic", r"etoh"],
+    "obesity": [r"obesity", r"obese", r"high bmi", r"body mass index", r"overweight"],
+    "hypertension": [r"hypertension", r"high blood pressure", r"elevated bp", r"htn"],
+    "diabetes": [r"diabetes", r"diabetic", r"high blood sugar", r"hyperglycemia", r"a1c"],
+    "high cholesterol": [r"hyperlipidemia", r"high cholesterol", r"elevated lipids", r"dyslipidemia"],
+    "heart disease": [r"coronary (artery|heart) disease", r"chd", r"cad", r"heart attack", r"myocardial infarction"],
+    "family history": [r"family history", r"genetic predisposition", r"hereditary"],
+    "sedentary lifestyle": [r"sedentary", r"physical inactivity", r"lack of exercise"],
+    "stress": [r"stress", r"anxiety", r"psychological stress"],
+    "poor diet": [r"poor diet", r"unhealthy eating", r"high sodium diet", r"high fat diet"]
+}
+
+# Patterns for likely medical terms that are not in any vocabulary
+POTENTIAL_TERM_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'\b[a-z]+(itis|osis|emia|opathy|ectomy|otomy|ostomy|plasty|scopy|gram|graphy)\b',  # Common medical suffixes
+    r'\b[a-z]{7,}\b',  # Long words (potential medical terms)
+    r'\b[A-Z][a-z]+-(induced|associated|related|positive|negative)\b',  # Compound medical terms
+    r'\b[A-Z][a-z]+/(anti-)?[A-Z][a-z]+\b',  # Medical ratios or relationships
+    r'\b[A-Z][a-z]+\s+[a-z]+(itis|osis|emia|opathy|ectomy|otomy|scopy)\b',  # Multi-word medical terms
+    r'\b[A-Z][a-z]+\s+[sS]yndrome\b',  # Named syndromes
+    r'\b[A-Z][a-z]+\'s\s+[dD]isease\b',  # Eponymous diseases
+    r'\b[A-Z][a-z]+\s+[dD]isease\b',  # Named diseases
+    r'\b[A-Z][a-z]+\s+[dD]eficiency\b',  # Deficiency conditions
+    r'\b[a-z]+[0-9]+\s+[dD]eficiency\b',  # Vitamin/factor deficiencies
+    r'\b[sS]tage\s+[IV]+\s+[a-zA-Z]+\b',  # Staged conditions
+    r'\b[gG]rade\s+[1-4]\s+[a-zA-Z]+\b',  # Graded conditions
+    r'\b[tT]ype\s+[1-4]\s+[a-zA-Z]+\b',  # Typed conditions
+    r'\b[a-z]+-[a-z]+\s+[sS]yndrome\b',  # Hyphenated syndromes
+]]
+
+def compile_term_pattern(terms: Iterable[str]) -> re.Pattern:
+    """
+    One case-insensitive alternation matching any of the terms as whole words.
+    Longer terms come first so the longest term wins where several match at
+    the same position.
+    """
+    alternatives = sorted(set(terms), key=len, reverse=True)
+    return re.compile(r'\b(?:' + '|'.join(map(re.escape, alternatives)) + r')\b', re.IGNORECASE)
+
+class TermMatcher:
+    """
+    Whole-word matcher for a vocabulary of terms, used on lowercased text. The
+    text is scanned once with a lookahead at every word start, so terms that
+    overlap each other (e.g. "cancer" in "lung cancer") are all found, just as
+    with one search per term.
+    """
+    def __init__(self, terms: Iterable[str]):
+        # Lowercased terms in vocabulary order, without duplicates
+        self.terms = list(dict.fromkeys(term.lower() for term in terms))
+        alternatives = sorted(self.terms, key=len, reverse=True)
+        self.pattern = re.compile(
+            r'\b(?=(' + '|'.join(map(re.escape, alternatives)) + r')\b)'
+        )
+        # Only the longest term is captured where several start at the same
+        # position; the shorter ones are whole-word prefixes of it
+        self.prefixes = {
+            term: [other for other in self.terms
+                   if other != term and term.startswith(other) and re.match(re.escape(other) + r'\b', term)]
+            for term in self.terms
+        }
+
+    def counts(self, lowered_text: str) -> Dict[str, int]:
+        """Number of whole-word occurrences of every term found in the lowercased text"""
+        counts = {}
+        for match in self.pattern.finditer(lowered_text):
+            term = match.group(1)
+            for found in [term] + self.prefixes.get(term, []):
+                counts[found] = counts.get(found, 0) + 1
+        return counts
+
+    def find(self, lowered_text: str) -> List[str]:
+        """The terms found in the lowercased text, in vocabulary order"""
+        return self.ordered(self.counts(lowered_text))
+
+    def ordered(self, found: Iterable[str]) -> List[str]:
+        """Found terms in vocabulary order"""
+        found = set(found)
+        return [term for term in self.terms if term in found]
+
+class SuffixMatcher:
+    """
+    Finds the words of a lowercased text that end in any of the suffixes with a
+    single scan. Words are listed by the precedence of their suffix, then by first
+    occurrence, as if each suffix had been searched for in turn.
+    """
+    def __init__(self, suffixes: List[str], min_length: int = 0):
+        self.suffixes = suffixes
+        self.min_length = min_length
+        self.pattern = re.compile(r'\b\w+(?:' + '|'.join(map(re.escape, suffixes)) + r')\b')
+
+    def _precedence(self, word: str) -> int:
+        return next(index for index, suffix in enumerate(self.suffixes)
+                    if word.endswith(suffix) and len(word) > len(suffix))
+
+    def find(self, lowered_text: str) -> List[str]:
+        words = {}
+        for match in self.pattern.finditer(lowered_text):
+            word = match.group(0)
+            if len(word) > self.min_length and word not in words:
+                words[word] = self._precedence(word)
+        # sorted() is stable, so words with the same suffix stay in text order
+        return sorted(words, key=words.get)
+
+class PatternGroupMatcher:
+    """
+    Finds which named groups of lowercase regexes (e.g. risk factors) occur in
+    a lowercased text with a single scan. Where patterns of several groups
+    match at the same position, the group listed first is recorded.
+    """
+    def __init__(self, groups: Dict[str, List[str]]):
+        self.names = list(groups)
+        self.pattern = re.compile(
+            '(?=' + '|'.join(
+                f'(?P<g{index}>' + '|'.join(f'(?:{pattern})' for pattern in patterns) + ')'
+                for index, patterns in enumerate(groups.values())
+            ) + ')'
+        )
+
+    def find(self, lowered_text: str) -> List[str]:
+        """Names of the groups found in the lowercased text, in registry order"""
+        found = set()
+        for match in self.pattern.finditer(lowered_text):
+            found.add(int(match.lastgroup[1:]))
+            if len(found) == len(self.names):
+                break
+        return [name for index, name in enumerate(self.names) if index in found]
+
+# Compiled once at import and shared by every module
+CONDITION_MATCHER = TermMatcher(MEDICAL_CONDITIONS)
+COMPLEX_TERM_MATCHER = TermMatcher(COMPLEX_MEDICAL_TERMS)
+COMMON_CONDITION_MATCHER = TermMatcher(COMMON_CONDITIONS)
+SUFFIX_TERM_MATCHER = SuffixMatcher(COMPLEX_TERM_SUFFIXES, min_length=5)
+RISK_MATCHER = PatternGroupMatcher(RISK_PATTERNS)
+
+def find_common_conditions(text: str) -> List[str]:
+    """COMMON_CONDITIONS mentioned in the text"""
+    return COMMON_CONDITION_MATCHER.find(text.lower())
+
+def find_suffix_terms(text: str) -> List[str]:
+    """Words longer than 5 characters with a medical suffix"""
+    return SUFFIX_TERM_MATCHER.find(text.lower())
+
+def find_risk_factors(text: str) -> List[str]:
+    """Names of the RISK_PATTERNS risk factors mentioned in the text"""
+    return RISK_MATCHER.find(text.lower())
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import os
+import socket
+from typing import Iterator, Optional
+
+# Seconds a request to the model server may take before the client gives up
+SUMMARIZER_SERVER_TIMEOUT = float(os.getenv("SUMMARIZER_SERVER_TIMEOUT", "300"))
+
+# Longest message line accepted on the socket (a whole report's text fits in one)
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+class ModelServerError(Exception):
+    """Raised when the model server answers a request with an error"""
+
+def encode_message(message: dict) -> bytes:
+    """One newline-delimited JSON message"""
+    return json.dumps(message).encode("utf-8") + b"\n"
+
+def _decode_response(line: bytes) -> dict:
+    if not line:
+        raise ConnectionError("Model server closed the connection")
+    response = json.loads(line)
+    if "error" in response:
+        raise ModelServerError(response["error"])
+    return response
+
+def _connect(path: str, timeout: Optional[float] = None) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout or SUMMARIZER_SERVER_TIMEOUT)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def request(path: str, op: str, timeout: Optional[float] = None, **payload) -> dict:
+    """Send one request to the model server and return its response"""
+    with _connect(path, timeout) as sock, sock.makefile("rb") as responses:
+        sock.sendall(encode_message({"op": op, **payload}))
+        return _decode_response(responses.readline(MAX_MESSAGE_BYTES))
+
+def iter_request(path: str, op: str, **payload) -> Iterator[dict]:
+    """Send a streaming request and yield each response until the server marks it done"""
+    with _connect(path) as sock, sock.makefile("rb") as responses:
+        sock.sendall(encode_message({"op": op, **payload}))
+        while True:
+            response = _decode_response(responses.readline(MAX_MESSAGE_BYTES))
+            if response.get("done"):
+                return
+            yield response
+
+async def request_async(path: str, op: str, timeout: Optional[float] = None, **payload) -> dict:
+    """Async version of request(), for use on the event loop"""
+    reader, writer = await asyncio.open_unix_connection(path, limit=MAX_MESSAGE_BYTES)
+    try:
+        writer.write(encode_message({"op": op, **payload}))
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), timeout or SUMMARIZER_SERVER_TIMEOUT)
+        return _decode_response(line)
+    finally:
+        writer.close()
@@ -0,0 +1,122 @@
+"""
+Model server: one process that owns the summarization model and serves the
+API workers over a Unix socket, so running uvicorn with several workers
+doesn't load one copy of the model per worker. Requests from all workers go
+through the same batching scheduler.
+
+Usage:
+    SUMMARIZER_SERVER_SOCKET=/tmp/summarizer.sock python model_server.py
+    SUMMARIZER_SERVER_SOCKET=/tmp/summarizer.sock uvicorn app:app --workers 4
+
+Protocol: newline-delimited JSON over the socket. Each request is an object
+with an "op":
+    {"op": "summarize", "text": ..., "wait": null} -> {"summary": ..., "engine": ...}
+    {"op": "stream", "text": ..., "wait": null}    -> {"piece": ..., "engine": ...} lines, then {"done": true}
+    {"op": "status"}                               -> {"summarizer": {...}, "batcher": {...}}
+Failures are answered with {"error": ...}.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+
+from dotenv import load_dotenv
+
+import summarizer
+from model_client import MAX_MESSAGE_BYTES, encode_message
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = "/tmp/medical-report-summarizer.sock"
+
+async def stream_summary(text, wait, writer):
+    """Run iter_summary() on a worker thread, writing each piece as it is produced"""
+    loop = asyncio.get_running_loop()
+    pieces = summarizer.iter_summary(text, wait)
+    try:
+        while True:
+            item = await loop.run_in_executor(None, next, pieces, None)
+            if item is None:
+                break
+            piece, engine = item
+            writer.write(encode_message({"piece": piece, "engine": engine}))
+            await writer.drain()
+    finally:
+        # Stops generating when the client has gone away
+        await loop.run_in_executor(None, pieces.close)
+    writer.write(encode_message({"done": True}))
+
+async def handle_request(request, writer):
+    op = request.get("op")
+    if op == "summarize":
+        summary, engine = await summarizer.summarize_async(request["text"], request.get("wait"))
+        writer.write(encode_message({"summary": summary, "engine": engine}))
+    elif op == "stream":
+        await stream_summary(request["text"], request.get("wait"), writer)
+    elif op == "status":
+        writer.write(encode_message({"summarizer": summarizer.model_status(), "batcher": summarizer.batcher_stats()}))
+    else:
+        writer.write(encode_message({"error": f"Unknown op: {op}"}))
+    await writer.drain()
+
+async def handle_connection(reader, writer):
+    """Serve the requests of one client connection until it closes"""
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                await handle_request(json.loads(line), writer)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                logger.error(f"Error handling model server request: {e}")
+                writer.write(encode_message({"error": str(e)}))
+                await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        # The API worker went away (e.g. the HTTP client disconnected)
+        pass
+    finally:
+        writer.close()
+
+async def serve(path):
+    if os.path.exists(path):
+        # Left behind by a previous server that didn't shut down cleanly
+        os.unlink(path)
+
+    summarizer.start_background_load()
+    summarizer.start_batcher()
+    server = await asyncio.start_unix_server(handle_connection, path=path, limit=MAX_MESSAGE_BYTES)
+    # Only processes of the same user (or group) may talk to the model
+    os.chmod(path, 0o660)
+    logger.info(f"Model server listening on {path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await summarizer.stop_batcher()
+        if os.path.exists(path):
+            os.unlink(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=os.getenv("SUMMARIZER_SERVER_SOCKET") or DEFAULT_SOCKET,
+                        help="Unix socket path to listen on (default: $SUMMARIZER_SERVER_SOCKET)")
+    args = parser.parse_args()
+
+    # This process owns the model, so it must not forward requests to itself
+    summarizer.SUMMARIZER_SERVER_SOCKET = None
+    try:
+        asyncio.run(serve(args.socket))
+    except KeyboardInterrupt:
+        logger.info("Model server stopped")
+
+if __name__ == "__main__":
+    main()
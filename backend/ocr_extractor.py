@@ -1,17 +1,207 @@
 import pytesseract
-from PIL import Image
+from document import ExtractedDocument, ExtractionError
+from PIL import Image, ImageOps
 from io import BytesIO
+import numpy as np
+from contextlib import contextmanager
+import threading
 import logging
+import queue
+import time
+import os
+
+# In-process tesseract binding; pytesseract (one subprocess per image) is the fallback
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def extract_image_text(file_bytes):
-    """Extract text from images using OCR"""
+# Maximum number of initialized tesseract engines kept alive per process (0 disables the pool)
+OCR_POOL_SIZE = int(os.getenv("OCR_POOL_SIZE", "2"))
+
+# Tesseract language data to load
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+
+# Image preprocessing profiles applied before OCR:
+#   target_dpi - downscale images scanned above this resolution
+#   max_side   - cap on the longest side in pixels (phone photos carry no useful DPI)
+#   binarize   - convert to black and white with an Otsu threshold
+#   deskew     - detect and undo small rotations (slower)
+OCR_PROFILES = {
+    "raw": None,  # no preprocessing, the image is passed to tesseract as decoded
+    "fast": {"target_dpi": 200, "max_side": 2200, "binarize": True, "deskew": False},
+    "accurate": {"target_dpi": 300, "max_side": 3500, "binarize": True, "deskew": True},
+}
+
+# Profile used for uploads (see OCR_PROFILES)
+OCR_PROFILE = os.getenv("OCR_PROFILE", "fast")
+
+# Largest rotation (in degrees) that deskewing will search for
+_DESKEW_MAX_ANGLE = 5.0
+
+_idle_engines = queue.LifoQueue()
+_engine_slots = threading.BoundedSemaphore(max(OCR_POOL_SIZE, 1))
+_engine_pool_failed = False
+
+@contextmanager
+def _pooled_engine():
+    """
+    Borrow an initialized tesserocr engine, creating one if the pool is not yet
+    full. Blocks while OCR_POOL_SIZE engines are in use. Yields None when the
+    engine cannot be initialized (e.g. missing tessdata).
+    """
+    global _engine_pool_failed
+    with _engine_slots:
+        try:
+            engine = _idle_engines.get_nowait()
+        except queue.Empty:
+            try:
+                engine = tesserocr.PyTessBaseAPI(lang=OCR_LANG)
+            except RuntimeError as e:
+                logger.warning(f"tesserocr engine unavailable, falling back to pytesseract: {e}")
+                _engine_pool_failed = True
+                engine = None
+        if engine is None:
+            yield None
+            return
+        try:
+            yield engine
+        finally:
+            engine.Clear()
+            _idle_engines.put(engine)
+
+def ocr_image(image):
+    """Run OCR on a PIL image and return the raw text (errors are raised)"""
+    if tesserocr is not None and OCR_POOL_SIZE > 0 and not _engine_pool_failed:
+        with _pooled_engine() as engine:
+            if engine is not None:
+                engine.SetImage(image)
+                return engine.GetUTF8Text()
+    return pytesseract.image_to_string(image, lang=OCR_LANG)
+
+def _get_profile(profile):
+    """Resolve a profile name to its settings (None means no preprocessing)"""
+    name = profile or OCR_PROFILE
+    if name not in OCR_PROFILES:
+        logger.warning(f"Unknown OCR profile '{name}', using 'fast'")
+        name = "fast"
+    return OCR_PROFILES[name]
+
+def _target_size(size, dpi, settings):
+    """Size an image should be scaled to so it is no larger than the profile allows"""
+    width, height = size
+    scale = 1.0
+    if dpi and dpi > settings["target_dpi"]:
+        scale = settings["target_dpi"] / dpi
+    scale = min(scale, settings["max_side"] / max(width, height))
+    if scale >= 1.0:
+        return size
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def _image_dpi(image):
+    """Horizontal DPI recorded in the image metadata, if any"""
+    dpi = image.info.get("dpi")
+    try:
+        return float(dpi[0]) if dpi else None
+    except (TypeError, ValueError):
+        return None
+
+def _otsu_threshold(image):
+    """Otsu threshold of a grayscale image, computed from its histogram"""
+    histogram = np.array(image.histogram()[:256], dtype=np.float64)
+    levels = np.arange(256)
+    weight_bg = np.cumsum(histogram)
+    weight_fg = weight_bg[-1] - weight_bg
+    sum_bg = np.cumsum(histogram * levels)
+    mean_bg = sum_bg / np.maximum(weight_bg, 1)
+    mean_fg = (sum_bg[-1] - sum_bg) / np.maximum(weight_fg, 1)
+    between_class = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between_class))
+
+def _skew_angle(image):
+    """
+    Estimate page rotation by maximizing the variance of the row projection
+    profile - text lines produce sharp peaks only when they are horizontal
+    """
+    sample = image.copy()
+    sample.thumbnail((800, 800))
+    threshold = _otsu_threshold(sample)
+    ink = sample.point(lambda v: 255 if v < threshold else 0)
+
+    def score(angle):
+        rotated = np.asarray(ink.rotate(angle, resample=Image.NEAREST, fillcolor=0), dtype=np.float32)
+        return rotated.sum(axis=1).var()
+
+    # Coarse search in 1 degree steps, then refine around the best angle
+    best = max(np.arange(-_DESKEW_MAX_ANGLE, _DESKEW_MAX_ANGLE + 1, 1.0), key=score)
+    return float(max(np.arange(best - 0.9, best + 1.0, 0.1), key=score))
+
+def preprocess_image(image, profile=None, dpi=None):
+    """
+    Prepare a decoded image for OCR according to a profile from OCR_PROFILES
+    (defaults to OCR_PROFILE): grayscale, DPI/size-targeted downscaling,
+    optional deskewing and binarization. `dpi` overrides the image metadata.
+    """
+    settings = _get_profile(profile)
+    if settings is None:
+        return image
+
+    if dpi is None:
+        dpi = _image_dpi(image)
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("L")
+
+    target_size = _target_size(image.size, dpi, settings)
+    if target_size != image.size:
+        resample = Image.LANCZOS if settings["deskew"] else Image.BILINEAR
+        image = image.resize(target_size, resample, reducing_gap=3.0)
+
+    if settings["deskew"]:
+        angle = _skew_angle(image)
+        if abs(angle) >= 0.1:
+            image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    if settings["binarize"]:
+        if settings["deskew"]:
+            image = ImageOps.autocontrast(image, cutoff=1)
+        threshold = _otsu_threshold(image)
+        image = image.point(lambda v: 255 if v > threshold else 0)
+
+    return image
+
+def load_image(source, profile=None):
+    """
+    Decode an uploaded image (bytes or a file path) and preprocess it for OCR. JPEGs are decoded in
+    draft mode, which lets libjpeg skip straight to a reduced-size grayscale image.
+    """
+    settings = _get_profile(profile)
+    image = Image.open(BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+    if settings is None:
+        return image
+
+    dpi = _image_dpi(image)
+    target_size = _target_size(image.size, dpi, settings)
+    if image.format == "JPEG" and target_size != image.size:
+        original_width = image.width
+        # draft() picks the smallest DCT scale that still covers target_size
+        image.draft("L", target_size)
+        if dpi:
+            dpi = dpi * image.width / original_width
+    return preprocess_image(image, profile, dpi)
+
+def extract_image_text(source, profile=None):
+    """
+    Extract text from images (bytes or a file path) using OCR.
+    Returns a single-page ExtractedDocument and raises ExtractionError on failure.
+    """
+    started = time.perf_counter()
     try:
-        image = Image.open(BytesIO(file_bytes))
-        text = pytesseract.image_to_string(image)
-        return text.strip() if text else "No text detected in the image."
+        image = load_image(source, profile)
+        text = ocr_image(image) or ""
     except Exception as e:
         logger.error(f"Error in OCR extraction: {e}")
-        return f"OCR extraction error: {str(e)}"
\ No newline at end of file
+        raise ExtractionError(f"OCR extraction error: {str(e)}") from e
+    return ExtractedDocument.from_pages([text], "image", {"extract": time.perf_counter() - started})
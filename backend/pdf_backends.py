@@ -0,0 +1,161 @@
+import pdfplumber
+from io import BytesIO
+import threading
+import logging
+import os
+
+from lab_extractor import extract_page_tables
+
+# Optional faster text backend built on PDFium
+try:
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+except ImportError:
+    pdfium = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# PDF parsing backend: "pdfplumber" (default, supports table extraction) or "pdfium"
+PDF_BACKEND = os.getenv("PDF_BACKEND", "pdfplumber").lower()
+
+# PDFium is not thread-safe: every call into it, for any document, holds this
+# lock, so concurrent uploads and the read-ahead thread can't crash the process.
+# Worker processes of the extraction pool each have their own copy
+_pdfium_lock = threading.RLock()
+
+class PdfplumberBackend:
+    """Pure-Python backend with layout analysis and table extraction"""
+    name = "pdfplumber"
+    supports_tables = True
+
+    def __init__(self, source):
+        if isinstance(source, (bytes, bytearray)):
+            source = BytesIO(source)
+        self._pdf = pdfplumber.open(source)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._pdf.close()
+
+    @property
+    def page_count(self):
+        return len(self._pdf.pages)
+
+    def page(self, index):
+        return PdfplumberPage(self._pdf.pages[index])
+
+class PdfplumberPage:
+    """One pdfplumber page behind the common page interface"""
+
+    def __init__(self, page):
+        self._page = page
+        self.number = page.page_number
+
+    def extract_text(self):
+        return self._page.extract_text() or ""
+
+    def has_images(self):
+        return bool(self._page.images)
+
+    def render(self, resolution):
+        return self._page.to_image(resolution=resolution).original
+
+    def extract_tables(self, text):
+        return extract_page_tables(self._page, text)
+
+    def close(self):
+        # Drop the parsed layout objects so memory tracks one page, not the document
+        self._page.close()
+
+class PdfiumBackend:
+    """PDFium-based backend: much faster text extraction, no table extraction"""
+    name = "pdfium"
+    supports_tables = False
+
+    def __init__(self, source):
+        with _pdfium_lock:
+            self._pdf = pdfium.PdfDocument(source)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        with _pdfium_lock:
+            self._pdf.close()
+
+    @property
+    def page_count(self):
+        with _pdfium_lock:
+            return len(self._pdf)
+
+    def page(self, index):
+        with _pdfium_lock:
+            return PdfiumPage(self._pdf[index], index + 1)
+
+class PdfiumPage:
+    """One PDFium page behind the common page interface"""
+
+    def __init__(self, page, number):
+        self._page = page
+        self.number = number
+
+    def extract_text(self):
+        with _pdfium_lock:
+            textpage = self._page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+            finally:
+                textpage.close()
+        return text.replace("\r\n", "\n").strip()
+
+    def has_images(self):
+        with _pdfium_lock:
+            return any(True for _ in self._page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_IMAGE]))
+
+    def render(self, resolution):
+        with _pdfium_lock:
+            bitmap = self._page.render(scale=resolution / 72)
+            try:
+                # Copied out of the bitmap so it can be released under the lock
+                return bitmap.to_pil().copy()
+            finally:
+                bitmap.close()
+
+    def extract_tables(self, text):
+        return []
+
+    def close(self):
+        with _pdfium_lock:
+            self._page.close()
+
+BACKENDS = {
+    "pdfplumber": PdfplumberBackend,
+    "pdfium": PdfiumBackend,
+}
+
+def get_backend(name=None):
+    """
+    Resolve a backend name (defaults to PDF_BACKEND) to its class, falling back
+    to pdfplumber when the name is unknown or its library is not installed
+    """
+    name = (name or PDF_BACKEND).lower()
+    if name not in BACKENDS:
+        logger.warning(f"Unknown PDF backend '{name}', using pdfplumber")
+        return PdfplumberBackend
+    if name == "pdfium" and pdfium is None:
+        logger.warning("pypdfium2 is not installed, using pdfplumber")
+        return PdfplumberBackend
+    return BACKENDS[name]
+
+def open_pdf(source, backend=None):
+    """Open a PDF given as raw bytes or a file path with the selected backend"""
+    return get_backend(backend)(source)
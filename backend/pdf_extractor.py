@@ -1,20 +1,364 @@
-import pdfplumber
-from io import BytesIO
+from ocr_extractor import ocr_image, preprocess_image
+from pdf_backends import open_pdf
+from document import ExtractedDocument, ExtractionError, PageText, PAGE_SEPARATOR
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
 import logging
+import queue
+import time
+import os
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def extract_pdf_text(file_bytes):
-    """Extract text content from a PDF file"""
-    text = ""
+# Number of worker processes for page-parallel extraction (1 disables it)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+
+# Documents shorter than this are extracted on the calling thread, where
+# process start-up and re-parsing the file would cost more than it saves
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+
+# Rendering resolution for pages that have no text layer and must be OCR'd
+PDF_OCR_RESOLUTION = int(os.getenv("PDF_OCR_RESOLUTION", "300"))
+
+# Whether tables (lab results) are extracted alongside the page text
+PDF_EXTRACT_TABLES = os.getenv("PDF_EXTRACT_TABLES", "1").lower() not in ("0", "false", "no")
+
+# Pages parsed ahead of the consumer when streaming a PDF page by page
+PDF_READ_AHEAD_PAGES = int(os.getenv("PDF_READ_AHEAD_PAGES", "2"))
+
+# Page ranges per worker when streaming a long PDF from the process pool
+PDF_STREAM_RANGES_PER_WORKER = 4
+
+_executor = None
+_executor_workers = 0
+
+def _get_executor(workers):
+    """Return the shared extraction process pool, creating it on first use"""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        # Spawned workers only import this module, not the models loaded by the API
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _executor_workers = workers
+    return _executor
+
+def _discard_broken_executor(error):
+    """Drop the shared pool after a worker died, so the next call starts a fresh one"""
+    global _executor
+    if isinstance(error, BrokenProcessPool) and _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+def _split_page_range(page_count, parts):
+    """Split range(page_count) into at most `parts` contiguous (start, stop) ranges"""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def _needs_ocr(page, text):
+    """A page needs OCR when it carries images but no extractable text layer"""
+    return not text.strip() and page.has_images()
+
+def _page_tables(page, text):
+    """Tables of a page with a text layer, when table extraction is enabled"""
+    if not PDF_EXTRACT_TABLES or not text.strip():
+        return []
+    return page.extract_tables(text)
+
+def _ocr_page(page):
+    """Rasterize a page and OCR it, returning an empty string on failure"""
     try:
-        with pdfplumber.open(BytesIO(file_bytes)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                text += page_text + "\n\n"
-        result = text.strip()
-        return result if result else "No text content found in the PDF."
+        image = page.render(PDF_OCR_RESOLUTION)
+        image = preprocess_image(image, dpi=PDF_OCR_RESOLUTION)
+        return (ocr_image(image) or "").strip()
+    except Exception as e:
+        logger.warning(f"OCR failed for PDF page {page.number}: {e}")
+        return ""
+
+def _extract_page_range(source, start, stop, backend=None):
+    """
+    Extract the text layer of pages [start, stop) - runs inside a worker process.
+    Returns (text, needs_ocr, tables) per page.
+    """
+    with open_pdf(source, backend) as pdf:
+        results = []
+        for i in range(start, stop):
+            page = pdf.page(i)
+            text = page.extract_text()
+            results.append((text, _needs_ocr(page, text), _page_tables(page, text)))
+            page.close()
+        return results
+
+def _ocr_page_indexes(source, indexes, backend=None):
+    """Rasterize and OCR the given pages - runs inside a worker process"""
+    with open_pdf(source, backend) as pdf:
+        texts = []
+        for i in indexes:
+            page = pdf.page(i)
+            texts.append(_ocr_page(page))
+            page.close()
+        return texts
+
+def _extract_pages_parallel(source, page_count, workers, backend=None):
+    """Extract all pages across the process pool and return them in page order"""
+    executor = _get_executor(workers)
+    futures = [
+        executor.submit(_extract_page_range, source, start, stop, backend)
+        for start, stop in _split_page_range(page_count, workers)
+    ]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+def _ocr_pages(source, indexes, workers, backend=None):
+    """OCR the image-only pages, spreading them over the process pool when worthwhile"""
+    if workers <= 1 or len(indexes) < 2:
+        return _ocr_page_indexes(source, indexes, backend)
+    executor = _get_executor(workers)
+    futures = [
+        executor.submit(_ocr_page_indexes, source, [indexes[i] for i in range(start, stop)], backend)
+        for start, stop in _split_page_range(len(indexes), workers)
+    ]
+    texts = []
+    for future in futures:
+        texts.extend(future.result())
+    return texts
+
+def extract_pdf_text(source, workers=None, backend=None):
+    """
+    Extract text content from a PDF file, given as bytes or a file path, using
+    the parsing backend from pdf_backends (defaults to PDF_BACKEND).
+    Long documents are split into page ranges and extracted in parallel by
+    `workers` processes (defaults to PDF_EXTRACT_WORKERS). Pages without a text
+    layer (scanned images) are rasterized and OCR'd, and merged back in page order.
+    Returns an ExtractedDocument (empty when the PDF holds no text) and raises
+    ExtractionError when the file cannot be read.
+    """
+    if workers is None:
+        workers = PDF_EXTRACT_WORKERS
+    started = time.perf_counter()
+    try:
+        with open_pdf(source, backend) as pdf:
+            page_count = pdf.page_count
+        parallel = workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES
+
+        pages = None
+        if parallel:
+            try:
+                pages = _extract_pages_parallel(source, page_count, workers, backend)
+            except Exception as e:
+                logger.warning(f"Parallel PDF extraction failed, falling back to serial: {e}")
+                _discard_broken_executor(e)
+        if pages is None:
+            pages = _extract_page_range(source, 0, page_count, backend)
+
+        page_texts = [text for text, _, _ in pages]
+        tables = [(i + 1, rows) for i, (_, _, page_tables) in enumerate(pages) for rows in page_tables]
+        ocr_indexes = [i for i, (_, needs_ocr, _) in enumerate(pages) if needs_ocr]
+        if ocr_indexes:
+            logger.info(f"OCR-ing {len(ocr_indexes)} of {page_count} PDF pages without a text layer")
+            try:
+                ocr_texts = _ocr_pages(source, ocr_indexes, workers, backend)
+            except Exception as e:
+                logger.warning(f"Parallel OCR failed, falling back to serial: {e}")
+                _discard_broken_executor(e)
+                ocr_texts = _ocr_page_indexes(source, ocr_indexes, backend)
+            for i, text in zip(ocr_indexes, ocr_texts):
+                page_texts[i] = text
     except Exception as e:
         logger.error(f"Error extracting PDF text: {e}")
-        return f"Error extracting text: {str(e)}"
\ No newline at end of file
+        raise ExtractionError(f"Error extracting text: {str(e)}") from e
+
+    return ExtractedDocument.from_pages(page_texts, "pdf", {"extract": time.perf_counter() - started}, tables)
+
+def _submit_ocr(source, index, workers, backend=None):
+    """
+    OCR one image-only page on the process pool, returning a Future of its
+    text, or OCR it here when there is no pool or it can't take work
+    """
+    if workers > 1:
+        try:
+            return _get_executor(workers).submit(_ocr_page_indexes, source, [index], backend)
+        except Exception as e:
+            logger.warning(f"Could not queue OCR of PDF page {index + 1} on the pool: {e}")
+            _discard_broken_executor(e)
+    return _ocr_page_indexes(source, [index], backend)[0]
+
+def _ocr_result(pending, source, index, backend=None):
+    """Text of a page queued with _submit_ocr, OCR'd here if the pool failed"""
+    if isinstance(pending, str):
+        return pending
+    try:
+        return pending.result()[0]
+    except Exception as e:
+        logger.warning(f"Parallel OCR of PDF page {index + 1} failed, retrying serially: {e}")
+        _discard_broken_executor(e)
+        return _ocr_page_indexes(source, [index], backend)[0]
+
+def _iter_pages(source, backend=None, start=0, workers=1):
+    """
+    Parse a PDF lazily from page index `start`, yielding (index, text, tables)
+    per page. Image-only pages are handed to the OCR pool, so their text is
+    the pending Future from _submit_ocr.
+    """
+    try:
+        pdf = open_pdf(source, backend)
+    except Exception as e:
+        logger.error(f"Error opening PDF: {e}")
+        raise ExtractionError(f"Error extracting text: {str(e)}") from e
+    with pdf:
+        for index in range(start, pdf.page_count):
+            try:
+                page = pdf.page(index)
+                text = page.extract_text()
+                tables = tuple(_page_tables(page, text))
+                if _needs_ocr(page, text):
+                    if workers > 1:
+                        text = _submit_ocr(source, index, workers, backend)
+                    else:
+                        text = _ocr_page(page)
+            except Exception as e:
+                logger.error(f"Error extracting PDF page {index + 1}: {e}")
+                raise ExtractionError(f"Error extracting text from page {index + 1}: {str(e)}") from e
+            yield index, text, tables
+            page.close()
+
+def _iter_pages_parallel(source, page_count, workers, backend=None):
+    """
+    Extract a long PDF in page ranges across the process pool and yield
+    (index, text, tables) in page order as each range completes. Image-only
+    pages are queued for OCR as soon as their range is extracted, so OCR of
+    later pages runs while earlier ones are consumed. Falls back to serial
+    parsing from the first page not yet yielded if the pool fails.
+    """
+    # Several ranges per worker, so the first pages arrive long before the last
+    ranges = _split_page_range(page_count, workers * PDF_STREAM_RANGES_PER_WORKER)
+    try:
+        executor = _get_executor(workers)
+        futures = [executor.submit(_extract_page_range, source, start, stop, backend) for start, stop in ranges]
+    except Exception as e:
+        logger.warning(f"Parallel PDF extraction failed, falling back to serial: {e}")
+        _discard_broken_executor(e)
+        yield from _iter_pages(source, backend, 0, workers)
+        return
+
+    extracted = {}
+
+    def collect(k):
+        start, _ = ranges[k]
+        pages = []
+        for index, (text, needs_ocr, tables) in enumerate(futures[k].result(), start=start):
+            if needs_ocr:
+                text = _submit_ocr(source, index, workers, backend)
+            pages.append((index, text, tuple(tables)))
+        extracted[k] = pages
+
+    for k in range(len(ranges)):
+        try:
+            # Queue the OCR of every range that is already extracted, not just this one
+            for j in range(k, len(ranges)):
+                if j not in extracted and futures[j].done():
+                    collect(j)
+            if k not in extracted:
+                collect(k)
+        except Exception as e:
+            logger.warning(f"Parallel PDF extraction failed, continuing serially: {e}")
+            _discard_broken_executor(e)
+            for future in futures[k:]:
+                future.cancel()
+            yield from _iter_pages(source, backend, ranges[k][0], workers)
+            return
+        yield from extracted.pop(k)
+
+def _page_texts(pages, source, backend=None):
+    """Wait for queued OCR and place (index, text, tables) pages in the joined document as PageText tuples"""
+    offset = 0
+    for index, text, tables in pages:
+        if index > 0:
+            offset += len(PAGE_SEPARATOR)
+        text = _ocr_result(text, source, index, backend)
+        yield PageText(index + 1, text, offset, offset + len(text), tables)
+        offset += len(text)
+
+def _read_ahead(pages, depth):
+    """Run a page iterator on a background thread, buffering up to `depth` pages"""
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+        finally:
+            pages.close()
+
+    threading.Thread(target=produce, name="pdf-read-ahead", daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Lets the producer exit if the consumer stops early
+        stopped.set()
+
+def iter_pdf_pages(source, read_ahead=None, backend=None, workers=None):
+    """
+    Stream a PDF (bytes or a file path) page by page as PageText tuples,
+    parsed with `backend` (defaults to PDF_BACKEND).
+    Documents of PDF_PARALLEL_MIN_PAGES or more are extracted in page ranges by
+    `workers` processes (defaults to PDF_EXTRACT_WORKERS) like extract_pdf_text,
+    and pages without a text layer are OCR'd on the same pool; pages are still
+    yielded in order. Shorter documents are parsed up to `read_ahead` pages
+    (defaults to PDF_READ_AHEAD_PAGES) ahead of the caller on a background
+    thread; 0 parses inline.
+    Failures are raised to the caller as ExtractionError.
+    """
+    if read_ahead is None:
+        read_ahead = PDF_READ_AHEAD_PAGES
+    if workers is None:
+        workers = PDF_EXTRACT_WORKERS
+    try:
+        with open_pdf(source, backend) as pdf:
+            page_count = pdf.page_count
+    except Exception as e:
+        logger.error(f"Error opening PDF: {e}")
+        raise ExtractionError(f"Error extracting text: {str(e)}") from e
+
+    if workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+        # The pool works ahead of the caller, no read-ahead thread needed
+        pages = _iter_pages_parallel(source, page_count, workers, backend)
+    else:
+        pages = _iter_pages(source, backend, 0, workers)
+        if read_ahead > 0:
+            # Deep enough to keep every worker busy with OCR'd pages
+            pages = _read_ahead(pages, max(read_ahead, workers))
+    return _page_texts(pages, source, backend)
@@ -0,0 +1,83 @@
+from collections import OrderedDict
+import threading
+import logging
+import os
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Maximum number of processed reports kept in the upload cache (0 disables it)
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "256"))
+
+# Approximate upper bound on the characters held by cached reports
+REPORT_CACHE_MAX_CHARS = int(os.getenv("REPORT_CACHE_MAX_CHARS", str(64 * 1024 * 1024)))
+
+def _entry_size(value):
+    """Rough size of a cached report: the characters of its string fields"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_entry_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_entry_size(v) for v in value)
+    return 0
+
+class ReportCache:
+    """
+    Least-recently-used cache of upload analysis results keyed by content hash,
+    bounded both by entry count and by total size
+    """
+
+    def __init__(self, max_entries=REPORT_CACHE_MAX_ENTRIES, max_chars=REPORT_CACHE_MAX_CHARS):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached result for `key`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Store a result, evicting the least recently used entries to stay within bounds"""
+        if self.max_entries <= 0:
+            return
+        size = _entry_size(value)
+        if size > self.max_chars:
+            logger.info(f"Not caching report {key[:12]}: {size} chars exceeds the cache limit")
+            return
+        with self._lock:
+            if key in self._entries:
+                self._chars -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._chars += size
+            while len(self._entries) > self.max_entries or self._chars > self.max_chars:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._chars -= evicted_size
+                self.evictions += 1
+
+    def stats(self):
+        """Hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "chars": self._chars,
+                "max_chars": self.max_chars,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
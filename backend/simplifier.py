@@ -1,7 +1,14 @@
 import re
 import logging
 import os
-from typing import Tuple, List, Dict, Set
+from bisect import bisect_right
+from functools import cached_property
+from typing import Tuple, List, Dict, Set, Iterable, Optional
+
+from medical_patterns import (
+    MEDICAL_CONDITIONS, COMPLEX_MEDICAL_TERMS, COMMON_CONDITIONS, RISK_PATTERNS, POTENTIAL_TERM_PATTERNS,
+    RISK_MATCHER, SUFFIX_TERM_MATCHER, TermMatcher, compile_term_pattern, find_risk_factors
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -256,48 +263,26 @@ condition_precautions = {
     ]
 }
 
-# Common risk factors that might appear in medical reports
-risk_patterns = {
-    "smoking": [r"smok(er|ing|es)", r"tobacco use", r"pack[- ]years"],
-    "alcohol": [r"alcohol (use|consumption|abuse)", r"drinks per (day|week)", r"alcoholic", r"etoh"],
-    "obesity": [r"obesity", r"obese", r"high BMI", r"body mass index", r"overweight"],
-    "hypertension": [r"hypertension", r"high blood pressure", r"elevated bp", r"htn"],
-    "diabetes": [r"diabetes", r"diabetic", r"high blood sugar", r"hyperglycemia", r"a1c"],
-    "high cholesterol": [r"hyperlipidemia", r"high cholesterol", r"elevated lipids", r"dyslipidemia"],
-    "heart disease": [r"coronary (artery|heart) disease", r"chd", r"cad", r"heart attack", r"myocardial infarction"],
-    "family history": [r"family history", r"genetic predisposition", r"hereditary"],
-    "sedentary lifestyle": [r"sedentary", r"physical inactivity", r"lack of exercise"],
-    "stress": [r"stress", r"anxiety", r"psychological stress"],
-    "poor diet": [r"poor diet", r"unhealthy eating", r"high sodium diet", r"high fat diet"]
-}
+# Conditions we can provide precautions for, found with a single scan
+PRECAUTION_CONDITION_MATCHER = TermMatcher(condition_precautions)
+
+# Every vocabulary the detectors look for, found together in one scan per document
+DOCUMENT_TERM_MATCHER = TermMatcher(
+    list(condition_precautions) + MEDICAL_CONDITIONS + COMPLEX_MEDICAL_TERMS + COMMON_CONDITIONS
+)
+
+# Common risk factors that might appear in medical reports (see medical_patterns)
+risk_patterns = RISK_PATTERNS
 
 def find_potential_medical_terms(text: str) -> Set[str]:
     """
     Use enhanced patterns to identify potential medical terms not in our dictionary
     """
     try:
-        # Enhanced patterns for medical terms
-        patterns = [
-            r'\b[a-z]+(itis|osis|emia|opathy|ectomy|otomy|ostomy|plasty|scopy|gram|graphy)\b',  # Common medical suffixes
-            r'\b[a-z]{7,}\b',  # Long words (potential medical terms)
-            r'\b[A-Z][a-z]+-(induced|associated|related|positive|negative)\b',  # Compound medical terms
-            r'\b[A-Z][a-z]+/(anti-)?[A-Z][a-z]+\b',  # Medical ratios or relationships
-            r'\b[A-Z][a-z]+\s+[a-z]+(itis|osis|emia|opathy|ectomy|otomy|scopy)\b',  # Multi-word medical terms
-            r'\b[A-Z][a-z]+\s+[sS]yndrome\b',  # Named syndromes
-            r'\b[A-Z][a-z]+\'s\s+[dD]isease\b',  # Eponymous diseases
-            r'\b[A-Z][a-z]+\s+[dD]isease\b',  # Named diseases
-            r'\b[A-Z][a-z]+\s+[dD]eficiency\b',  # Deficiency conditions
-            r'\b[a-z]+[0-9]+\s+[dD]eficiency\b',  # Vitamin/factor deficiencies
-            r'\b[sS]tage\s+[IV]+\s+[a-zA-Z]+\b',  # Staged conditions
-            r'\b[gG]rade\s+[1-4]\s+[a-zA-Z]+\b',  # Graded conditions
-            r'\b[tT]ype\s+[1-4]\s+[a-zA-Z]+\b',  # Typed conditions
-            r'\b[a-z]+-[a-z]+\s+[sS]yndrome\b',  # Hyphenated syndromes
-        ]
-        
         potential_terms = set()
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        # Enhanced patterns for medical terms, compiled once in medical_patterns
+        for pattern in POTENTIAL_TERM_PATTERNS:
+            for match in pattern.finditer(text):
                 term = match.group(0).lower()
                 if term not in medical_dictionary and len(term) > 5:
                     potential_terms.add(term)
@@ -341,27 +326,192 @@ def extract_conditions_from_text(text: str) -> List[str]:
     """
     Extract medical conditions from the text that we can provide precautions for
     """
-    found_conditions = []
-    for condition in condition_precautions.keys():
-        # Search for the condition in the text
-        if re.search(r'\b' + re.escape(condition) + r'\b', text, re.IGNORECASE):
-            found_conditions.append(condition)
-    
-    return found_conditions
+    return PRECAUTION_CONDITION_MATCHER.find(text.lower())
 
 def identify_risk_factors(text: str) -> Dict[str, bool]:
     """
     Identify risk factors mentioned in the medical report
     """
-    risk_factors = {}
+    return {risk_name: True for risk_name in find_risk_factors(text)}
+
+WORD_PATTERN = re.compile(r'\w+')
+
+class TokenIndex:
+    """
+    One tokenization of a text, built once so the glossary can look up the
+    original casing of every explained term without rescanning the text
+    """
+    def __init__(self, text: str):
+        self.casing = {}  # lowercased word -> first casing seen in the text
+        for word in WORD_PATTERN.findall(text):
+            self.casing.setdefault(word.lower(), word)
     
-    for risk_name, patterns in risk_patterns.items():
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                risk_factors[risk_name] = True
-                break
+    def original_casing(self, term: str) -> Optional[str]:
+        """The term as first written in the text, if it is a single word that occurs"""
+        return self.casing.get(term.lower())
+
+class AnalysisContext:
+    """
+    Everything the detectors need from one document, computed once instead of
+    by each detector rescanning the text: the lowercased text, the vocabulary
+    terms it mentions with their counts and its risk factors.
+    """
+    def __init__(self, text: str):
+        self.text = text
+        self.lowered = text.lower()
+        # Occurrences of every DOCUMENT_TERM_MATCHER term in the document
+        self.term_counts = DOCUMENT_TERM_MATCHER.counts(self.lowered)
+        self.risks = {risk_name: True for risk_name in RISK_MATCHER.find(self.lowered)}
+    
+    @cached_property
+    def suffix_terms(self) -> List[str]:
+        """Words with a medical suffix (see medical_patterns.find_suffix_terms)"""
+        return SUFFIX_TERM_MATCHER.find(self.lowered)
+    
+    def terms(self, matcher: TermMatcher) -> List[str]:
+        """The terms of a vocabulary in DOCUMENT_TERM_MATCHER found in the document, in vocabulary order"""
+        return matcher.ordered(self.term_counts)
+
+# All medical_dictionary terms, found in a single scan of the text
+DICTIONARY_PATTERN = compile_term_pattern(medical_dictionary)
+
+def find_term_spans(text: str, skip_terms: Set[str] = frozenset()) -> List[Tuple[int, int, str, str]]:
+    """
+    Every occurrence of a medical term in `text` as (start, end, term, source),
+    sorted by position. `term` is the lowercased term and `source` is
+    "dictionary" for medical_dictionary terms or "potential" for other likely
+    medical terms, which are skipped when they are in `skip_terms` or overlap
+    a dictionary term.
+    """
+    # Terms in our dictionary, all found in one pass
+    spans = [
+        (match.start(), match.end(), match.group(0).lower(), "dictionary")
+        for match in DICTIONARY_PATTERN.finditer(text)
+    ]
+    
+    try:
+        potential_terms = [
+            term for term in find_potential_medical_terms(text)
+            if term not in skip_terms and len(term) > 5
+        ]
+        if potential_terms:
+            starts = [start for start, _, _, _ in spans]
+            potential_spans = []
+            for match in compile_term_pattern(potential_terms).finditer(text):
+                index = bisect_right(starts, match.start()) - 1
+                if index >= 0 and spans[index][1] > match.start():
+                    continue
+                if index + 1 < len(starts) and starts[index + 1] < match.end():
+                    continue
+                potential_spans.append((match.start(), match.end(), match.group(0).lower(), "potential"))
+            spans = sorted(spans + potential_spans)
+    except Exception as e:
+        logger.error(f"Error identifying additional terms: {e}")
+    
+    return spans
+
+def _explanation(matched_term: str, term: str, source: str) -> str:
+    """A term followed by its inline explanation"""
+    if source == "dictionary":
+        return f"{matched_term} (meaning: {medical_dictionary[term]})"
+    return f"{matched_term} (possibly {provide_general_explanation(term)})"
+
+def _explain_terms(text: str, explained_terms: Set[str], unknown_terms: List[str]) -> str:
+    """
+    Insert explanations for the medical terms in `text` that are not yet in
+    `explained_terms`; both collections are updated in place. The first
+    occurrence of each term is explained, and the rewritten text is built with
+    a single join.
+    """
+    parts = []
+    position = 0
+    for start, end, term, source in find_term_spans(text, explained_terms):
+        if term in explained_terms:
+            continue
+        explained_terms.add(term)
+        matched_term = text[start:end]
+        parts.append(text[position:start])
+        parts.append(_explanation(matched_term, term, source))
+        position = end
+        if source == "potential":
+            # Add to unknown terms for potential AI explanation
+            unknown_terms.append(matched_term)
+    parts.append(text[position:])
+    return "".join(parts)
+
+def annotate_text(text: str) -> Dict:
+    """
+    Find the medical terms in `text` without rewriting it. Returns
+    {"spans": [[start, end, term_id], ...], "definitions": [...], "unknown_terms": [...]}
+    where term_id indexes the deduplicated definitions table, whose entries are
+    {"term", "meaning", "source"} ("dictionary" or "potential"). Every
+    occurrence of a term gets a span; render_inline() turns the result back
+    into the inline-explained text simplify_text() returns.
+    """
+    spans = []
+    definitions = []
+    term_ids = {}
+    unknown_terms = []
+    for start, end, term, source in find_term_spans(text):
+        term_id = term_ids.get(term)
+        if term_id is None:
+            term_id = term_ids[term] = len(definitions)
+            matched_term = text[start:end]
+            if source == "dictionary":
+                meaning = medical_dictionary[term]
+            else:
+                meaning = provide_general_explanation(term)
+                unknown_terms.append(matched_term)
+            definitions.append({"term": matched_term, "meaning": meaning, "source": source})
+        spans.append([start, end, term_id])
+    return {"spans": spans, "definitions": definitions, "unknown_terms": list(set(unknown_terms))}
+
+def render_inline(text: str, annotations: Dict) -> str:
+    """Render annotate_text() output as inline explanations plus a glossary, like simplify_text()"""
+    definitions = annotations["definitions"]
+    explained = set()
+    parts = []
+    position = 0
+    for start, end, term_id in annotations["spans"]:
+        if term_id in explained:
+            continue
+        explained.add(term_id)
+        definition = definitions[term_id]
+        parts.append(text[position:start])
+        parts.append(_explanation(text[start:end], definition["term"].lower(), definition["source"]))
+        position = end
+    parts.append(text[position:])
+    
+    explained_terms = {definitions[term_id]["term"].lower() for term_id in explained}
+    return "".join(parts) + _build_glossary(TokenIndex(text), explained_terms, [])
+
+def _build_glossary(token_index: TokenIndex, explained_terms: Set[str], unknown_terms: List[str]) -> str:
+    """Build the glossary appended to simplified text, using the original text's casing"""
+    if not explained_terms:
+        return ""
+    
+    glossary = ["\n\n--- MEDICAL TERMS GLOSSARY ---\n"]
+    listed_unknown = set(unknown_terms)
+    for term_lower in sorted(explained_terms):
+        try:
+            # Use the original cased version if possible
+            term_to_use = token_index.original_casing(term_lower) or term_lower.capitalize()
+            simple = medical_dictionary.get(term_lower.lower())
+            if not simple:
+                simple = provide_general_explanation(term_lower)
+                
+                # Mark as needing AI explanation if it's not definitive
+                if simple == "a medical term - click for more information":
+                    if term_to_use not in listed_unknown:
+                        listed_unknown.add(term_to_use)
+                        unknown_terms.append(term_to_use)
+            
+            glossary.append(f"\n{term_to_use}: {simple}")
+        except Exception as glossary_error:
+            logger.error(f"Error adding term to glossary: {glossary_error}")
+            continue
     
-    return risk_factors
+    return "".join(glossary)
 
 def simplify_text(text: str) -> Tuple[str, List[str]]:
     """
@@ -371,103 +521,64 @@ def simplify_text(text: str) -> Tuple[str, List[str]]:
         return "No text provided for simplification.", []
     
     try:
-        simplified = text
         explained_terms = set()  # Track terms we've already explained
         unknown_terms = []  # Track terms that need AI explanation
         
-        # First pass: Handle terms in our dictionary
-        # Process longer terms first to avoid partial matches
-        sorted_terms = sorted(medical_dictionary.keys(), key=len, reverse=True)
-        
-        for term in sorted_terms:
-            try:
-                # Case insensitive search with word boundaries
-                pattern = re.compile(r'\b' + re.escape(term) + r'\b', re.IGNORECASE)
-                matches = list(pattern.finditer(simplified))
-                
-                # Process matches in reverse order to avoid offset issues
-                for match in reversed(matches):
-                    matched_term = match.group(0)
-                    if matched_term.lower() not in explained_terms:
-                        # First occurrence - add explanation
-                        simple = medical_dictionary[term]
-                        replacement = f"{matched_term} (meaning: {simple})"
-                        simplified = simplified[:match.start()] + replacement + simplified[match.end():]
-                        explained_terms.add(matched_term.lower())
-            except Exception as term_error:
-                logger.error(f"Error processing term '{term}': {term_error}")
-                continue
-        
-        # Second pass: Try to identify other potential medical terms
-        try:
-            potential_terms = find_potential_medical_terms(text)
-            for term in potential_terms:
-                if term.lower() not in explained_terms and len(term) > 5:
-                    pattern = re.compile(r'\b' + re.escape(term) + r'\b', re.IGNORECASE)
-                    matches = list(pattern.finditer(simplified))
-                    
-                    # Process matches in reverse order
-                    for match in reversed(matches):
-                        matched_term = match.group(0)
-                        if matched_term.lower() not in explained_terms:
-                            explanation = provide_general_explanation(term)
-                            replacement = f"{matched_term} (possibly {explanation})"
-                            simplified = simplified[:match.start()] + replacement + simplified[match.end():]
-                            explained_terms.add(matched_term.lower())
-                            
-                            # Add to unknown terms for potential AI explanation
-                            unknown_terms.append(matched_term)
-        except Exception as e:
-            logger.error(f"Error identifying additional terms: {e}")
+        simplified = _explain_terms(text, explained_terms, unknown_terms)
         
         # Create a glossary of terms at the end
-        if explained_terms:
-            glossary = "\n\n--- MEDICAL TERMS GLOSSARY ---\n"
-            for term_lower in sorted(explained_terms):
-                try:
-                    # Find the original cased version if possible
-                    original_term = None
-                    for match in re.finditer(r'\b\w+\b', text, re.IGNORECASE):
-                        if match.group(0).lower() == term_lower:
-                            original_term = match.group(0)
-                            break
-                    
-                    term_to_use = original_term or term_lower.capitalize()
-                    simple = medical_dictionary.get(term_lower.lower())
-                    if not simple:
-                        simple = provide_general_explanation(term_lower)
-                        
-                        # Mark as needing AI explanation if it's not definitive
-                        if simple == "a medical term - click for more information":
-                            if term_to_use not in unknown_terms:
-                                unknown_terms.append(term_to_use)
-                    
-                    glossary += f"\n{term_to_use}: {simple}"
-                except Exception as glossary_error:
-                    logger.error(f"Error adding term to glossary: {glossary_error}")
-                    continue
-            
-            simplified += glossary
+        simplified += _build_glossary(TokenIndex(text), explained_terms, unknown_terms)
 
         return simplified, list(set(unknown_terms))
     except Exception as e:
         logger.error(f"Error in simplify_text: {e}")
         return text + "\n\nNote: There was an error simplifying this text. Some medical terms may not be explained.", []
 
-def generate_precautions(text: str) -> Tuple[List[str], Dict[str, bool], str]:
+def simplify_pages(pages: Iterable[str], separator: str = "\n\n") -> Tuple[str, List[str]]:
     """
-    Generate precautions based on identified conditions and risk factors.
-    Returns:
-        - List of precautions
-        - Dictionary of risk factors
-        - Primary detected condition (or None if none detected)
+    Simplify a document one page at a time as pages arrive, so work can start
+    before the whole document has been extracted. Each term is explained only
+    once per document and a single glossary is appended at the end.
+    Errors raised by the page iterator itself are propagated to the caller.
     """
+    original_pages = []
+    simplified_pages = []
+    explained_terms = set()
+    unknown_terms = []
+    failed = False
+    
+    for page in pages:
+        original_pages.append(page)
+        try:
+            simplified_pages.append(_explain_terms(page, explained_terms, unknown_terms) if page else page)
+        except Exception as e:
+            logger.error(f"Error in simplify_pages: {e}")
+            simplified_pages.append(page)
+            failed = True
+    
+    text = separator.join(original_pages).strip()
+    if not text:
+        return "No text provided for simplification.", []
+    
+    simplified = separator.join(simplified_pages).strip()
     try:
-        # Extract conditions
-        conditions = extract_conditions_from_text(text)
-        
-        # Identify risk factors
-        risks = identify_risk_factors(text)
+        simplified += _build_glossary(TokenIndex(text), explained_terms, unknown_terms)
+    except Exception as e:
+        logger.error(f"Error in simplify_pages: {e}")
+        failed = True
+    
+    if failed:
+        simplified += "\n\nNote: There was an error simplifying this text. Some medical terms may not be explained."
+    return simplified, list(set(unknown_terms))
+
+def build_precautions(context: AnalysisContext) -> Tuple[List[str], Dict[str, bool], str]:
+    """
+    Build precautions from the conditions and risk factors already detected in
+    a document's AnalysisContext. Returns the same tuple as generate_precautions.
+    """
+    try:
+        conditions = context.terms(PRECAUTION_CONDITION_MATCHER)
+        risks = context.risks
         
         # Generate precautions
         all_precautions = []
@@ -522,4 +633,20 @@ def generate_precautions(text: str) -> Tuple[List[str], Dict[str, bool], str]:
     
     except Exception as e:
         logger.error(f"Error generating precautions: {e}")
-        return ["Error generating precautions. Please consult your healthcare provider."], {}, None
\ No newline at end of file
+        return ["Error generating precautions. Please consult your healthcare provider."], {}, None
+
+def generate_precautions(text: str) -> Tuple[List[str], Dict[str, bool], str]:
+    """
+    Generate precautions based on identified conditions and risk factors.
+    Returns:
+        - List of precautions
+        - Dictionary of risk factors
+        - Primary detected condition (or None if none detected)
+    """
+    try:
+        # Conditions and risk factors are detected with a single scan of the text
+        return build_precautions(AnalysisContext(text))
+    
+    except Exception as e:
+        logger.error(f"Error generating precautions: {e}")
+        return ["Error generating precautions. Please consult your healthcare provider."], {}, None
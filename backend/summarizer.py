@@ -1,49 +1,688 @@
-from transformers import pipeline
-import re
+import os
+import asyncio
+import time
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+import model_client
+from batch_scheduler import MicroBatcher
+from extractive import extractive_summary, select_sentences, split_sentences
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize the summarization pipeline
-try:
-    summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-    logger.info("Summarization model loaded successfully")
-except Exception as e:
-    logger.error(f"Error loading summarization model: {e}")
-    summarizer = None
+# Supported summarization models. max_input_tokens is the model's input window;
+# prefix is the task prompt T5-style models expect in front of the text.
+SUMMARIZATION_MODELS = {
+    "facebook/bart-large-cnn": {"max_input_tokens": 1024, "prefix": ""},
+    "sshleifer/distilbart-cnn-12-6": {"max_input_tokens": 1024, "prefix": ""},
+    "sshleifer/distilbart-cnn-6-6": {"max_input_tokens": 1024, "prefix": ""},
+    "google/flan-t5-base": {"max_input_tokens": 512, "prefix": "summarize: "},
+    "t5-small": {"max_input_tokens": 512, "prefix": "summarize: "},
+}
 
-def summarize_text(text):
-    """Summarize the provided text"""
+DEFAULT_SUMMARIZER_MODEL = "facebook/bart-large-cnn"
+
+# Summarization model, loaded in the background by start_background_load()
+SUMMARIZER_MODEL = os.getenv("SUMMARIZER_MODEL", DEFAULT_SUMMARIZER_MODEL)
+
+# Local directory model weights are downloaded to and loaded from (defaults to
+# the Hugging Face cache)
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR") or None
+
+# Inference engine: "torch" (PyTorch eager) or "onnx" (int8-quantized ONNX Runtime,
+# falls back to torch when optimum/onnxruntime are not installed)
+SUMMARIZER_ENGINE = os.getenv("SUMMARIZER_ENGINE", "torch").lower()
+
+# Where the exported and quantized ONNX models are cached between runs
+SUMMARIZER_ONNX_DIR = os.getenv(
+    "SUMMARIZER_ONNX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "onnx")
+)
+
+# Unix socket of the model server (model_server.py). When set, this process
+# loads no model and sends summarization requests to the server instead
+SUMMARIZER_SERVER_SOCKET = os.getenv("SUMMARIZER_SERVER_SOCKET") or None
+
+# Seconds a request waits for a model that is still loading before degrading
+SUMMARIZER_WAIT_SECONDS = float(os.getenv("SUMMARIZER_WAIT_SECONDS", "5"))
+
+# Chunks of a document summarized together in one batched forward pass
+SUMMARIZER_BATCH_SIZE = int(os.getenv("SUMMARIZER_BATCH_SIZE", "4"))
+
+# How long the scheduler holds a partial batch open for chunks from other requests
+SUMMARIZER_BATCH_WAIT_MS = float(os.getenv("SUMMARIZER_BATCH_WAIT_MS", "20"))
+
+# Hierarchical mode: chunk summaries are merged and summarized again, round by
+# round, until they fit one input window, instead of being concatenated
+SUMMARIZER_HIERARCHICAL = os.getenv("SUMMARIZER_HIERARCHICAL", "1") == "1"
+
+# At most this many summaries are merged into one input per reduce round
+SUMMARIZER_REDUCE_FAN_IN = max(2, int(os.getenv("SUMMARIZER_REDUCE_FAN_IN", "4")))
+
+# Reduce rounds after which the remaining summaries are concatenated as they are
+SUMMARIZER_MAX_REDUCE_DEPTH = int(os.getenv("SUMMARIZER_MAX_REDUCE_DEPTH", "3"))
+
+# Worker processes the chunk summaries (map step) are spread across; each loads
+# its own copy of the model. 0 or 1 summarizes in-process
+SUMMARIZER_MAP_WORKERS = int(os.getenv("SUMMARIZER_MAP_WORKERS", "0"))
+
+# Extractive pre-filter: long reports are cut down to their highest-ranked
+# sentences before abstractive summarization
+SUMMARIZER_PREFILTER = os.getenv("SUMMARIZER_PREFILTER", "1") == "1"
+
+# Token budget of the text kept by the pre-filter
+SUMMARIZER_PREFILTER_TOKENS = int(os.getenv("SUMMARIZER_PREFILTER_TOKENS", "4096"))
+
+# Above this many chunks waiting for the model, new requests get an extractive
+# summary instead of queueing (0 disables load shedding)
+SUMMARIZER_MAX_QUEUE_DEPTH = int(os.getenv("SUMMARIZER_MAX_QUEUE_DEPTH", "64"))
+
+# Summaries streamed token by token at the same time; further streams wait up
+# to SUMMARIZER_WAIT_SECONDS for a slot, then get an extractive summary (0 disables the limit)
+SUMMARIZER_MAX_STREAMS = int(os.getenv("SUMMARIZER_MAX_STREAMS", "2"))
+
+# Sentences in an extractive summary
+EXTRACTIVE_SUMMARY_SENTENCES = 5
+
+# Generation length limits for each chunk summary
+SUMMARY_MAX_LENGTH = 150
+SUMMARY_MIN_LENGTH = 30
+
+# Text summarized once after loading so the first request doesn't pay for warm-up
+WARMUP_TEXT = (
+    "The patient was admitted with shortness of breath and chest pain. An electrocardiogram "
+    "showed no acute changes and troponin levels were within normal limits. The patient was "
+    "treated with nebulizers and discharged home in stable condition with follow-up in one week."
+)
+
+# The summarization pipeline (None until the model is ready)
+summarizer = None
+
+_model_ready = threading.Event()
+_load_lock = threading.Lock()
+_model_status = {"state": "not_loaded", "model": None, "engine": None, "error": None, "load_seconds": None}
+
+# Scheduler batching chunks across concurrent requests (None until start_batcher())
+_batcher = None
+
+# Slots for streamed generations (None when SUMMARIZER_MAX_STREAMS is 0)
+_stream_slots = threading.BoundedSemaphore(SUMMARIZER_MAX_STREAMS) if SUMMARIZER_MAX_STREAMS > 0 else None
+
+# Process pool for the map step (None until first used, or when disabled)
+_map_executor = None
+_map_executor_failed = False
+
+def get_model_name(name: Optional[str] = None) -> str:
+    """
+    Resolve a model id (defaults to SUMMARIZER_MODEL), falling back to the
+    default model when it isn't in SUMMARIZATION_MODELS
+    """
+    name = name or SUMMARIZER_MODEL
+    if name not in SUMMARIZATION_MODELS:
+        logger.warning(f"Unsupported summarization model '{name}', using {DEFAULT_SUMMARIZER_MODEL}")
+        return DEFAULT_SUMMARIZER_MODEL
+    return name
+
+# Settings of the model the pipeline was built for
+_model_spec = SUMMARIZATION_MODELS[DEFAULT_SUMMARIZER_MODEL]
+
+def _quantized_onnx_dir(model_name: str) -> str:
+    """
+    Export the model to ONNX and quantize its weights to int8 (dynamic
+    quantization), caching both under SUMMARIZER_ONNX_DIR. Returns the
+    directory holding the quantized model.
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoConfig, AutoTokenizer
+
+    export_dir = os.path.join(SUMMARIZER_ONNX_DIR, model_name.replace("/", "--"))
+    quantized_dir = export_dir + "-int8"
+    if os.path.exists(os.path.join(quantized_dir, "config.json")):
+        return quantized_dir
+
+    if not os.path.exists(os.path.join(export_dir, "config.json")):
+        logger.info(f"Exporting {model_name} to ONNX in {export_dir}")
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, cache_dir=MODEL_CACHE_DIR)
+        model.save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model_name, cache_dir=MODEL_CACHE_DIR).save_pretrained(export_dir)
+
+    # Dynamic quantization: int8 weights, activations quantized on the fly, no calibration data
+    logger.info(f"Quantizing ONNX model to int8 in {quantized_dir}")
+    config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    for file_name in sorted(os.listdir(export_dir)):
+        if file_name.endswith(".onnx"):
+            quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=file_name)
+            quantizer.quantize(save_dir=quantized_dir, quantization_config=config)
+    AutoTokenizer.from_pretrained(export_dir).save_pretrained(quantized_dir)
+    # Written last: its presence marks a complete quantized model
+    AutoConfig.from_pretrained(export_dir).save_pretrained(quantized_dir)
+    return quantized_dir
+
+def _onnx_file_names(model_dir: str) -> dict:
+    """
+    File name arguments for ORTModelForSeq2SeqLM, read from the quantized models
+    in `model_dir`: optimum exports either one merged decoder (with and without
+    past key values in one graph) or separate decoder and decoder-with-past models
+    """
+    files = sorted(f for f in os.listdir(model_dir) if f.endswith(".onnx"))
+    encoders = [f for f in files if f.startswith("encoder")]
+    merged = [f for f in files if f.startswith("decoder") and "merged" in f]
+    with_past = [f for f in files if f.startswith("decoder_with_past")]
+    decoders = [f for f in files if f.startswith("decoder") and f not in merged and f not in with_past]
+    if not encoders or not (merged or decoders):
+        raise FileNotFoundError(f"No ONNX encoder/decoder models found in {model_dir}")
+
+    file_names = {"encoder_file_name": encoders[0]}
+    if merged:
+        file_names["decoder_file_name"] = merged[0]
+    else:
+        file_names["decoder_file_name"] = decoders[0]
+        if with_past:
+            file_names["decoder_with_past_file_name"] = with_past[0]
+    return file_names
+
+def _build_onnx_pipeline(model_name: str):
+    """Summarization pipeline running the int8-quantized model on ONNX Runtime"""
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import AutoTokenizer, pipeline
+
+    model_dir = _quantized_onnx_dir(model_name)
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_dir, **_onnx_file_names(model_dir))
+    return pipeline("summarization", model=model, tokenizer=AutoTokenizer.from_pretrained(model_dir))
+
+def build_pipeline(engine: Optional[str] = None, model_name: Optional[str] = None):
+    """
+    Build the summarization pipeline for an engine (defaults to SUMMARIZER_ENGINE)
+    and a model from SUMMARIZATION_MODELS (defaults to SUMMARIZER_MODEL).
+    Returns (pipeline, engine actually used); the ONNX engine falls back to
+    PyTorch if it can't be built.
+    """
+    engine = (engine or SUMMARIZER_ENGINE).lower()
+    model_name = get_model_name(model_name)
+    if engine == "onnx":
+        try:
+            return _build_onnx_pipeline(model_name), "onnx"
+        except ImportError as e:
+            logger.warning(f"ONNX Runtime engine unavailable ({e}), using PyTorch")
+        except Exception as e:
+            logger.error(f"Error building ONNX Runtime engine, using PyTorch: {e}")
+    elif engine != "torch":
+        logger.warning(f"Unknown summarizer engine '{engine}', using PyTorch")
+
+    # Imported here so importing this module doesn't pull in torch
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+    tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=MODEL_CACHE_DIR)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name, cache_dir=MODEL_CACHE_DIR)
+    return pipeline("summarization", model=model, tokenizer=tokenizer), "torch"
+
+def use_pipeline(pipeline, model_name: str):
+    """Make a built pipeline the one chunk_text() and generate_summaries() use"""
+    global summarizer, _model_spec
+    _model_spec = SUMMARIZATION_MODELS[model_name]
+    summarizer = pipeline
+
+def load_model():
+    """Load the summarization model and run a warm-up inference (blocking)"""
+    with _load_lock:
+        if _model_ready.is_set():
+            return summarizer
+        model_name = get_model_name()
+        _model_status.update(state="loading", model=model_name, error=None)
+        started = time.perf_counter()
+        try:
+            model, engine = build_pipeline(model_name=model_name)
+            prefix = SUMMARIZATION_MODELS[model_name]["prefix"]
+            model(prefix + WARMUP_TEXT, max_length=40, min_length=10, do_sample=False, truncation=True)
+            use_pipeline(model, model_name)
+            _model_status.update(state="ready", engine=engine, load_seconds=round(time.perf_counter() - started, 2))
+            logger.info(f"Summarization model {model_name} loaded successfully ({engine}) "
+                        f"in {_model_status['load_seconds']}s")
+        except Exception as e:
+            logger.error(f"Error loading summarization model: {e}")
+            _model_status.update(state="failed", error=str(e))
+        finally:
+            # Also set on failure so waiting requests stop waiting
+            _model_ready.set()
+        return summarizer
+
+def start_background_load():
+    """Start loading the model on a background thread; returns immediately"""
+    if SUMMARIZER_SERVER_SOCKET:
+        # The model server owns the model
+        return
+    if _model_status["state"] == "not_loaded":
+        _model_status["state"] = "loading"
+        threading.Thread(target=load_model, name="summarizer-load", daemon=True).start()
+
+def model_status() -> dict:
+    """
+    Loading state of the model: not_loaded, loading, ready or failed
+    (or unavailable when the model server can't be reached)
+    """
+    if SUMMARIZER_SERVER_SOCKET:
+        try:
+            return model_client.request(SUMMARIZER_SERVER_SOCKET, "status", timeout=2)["summarizer"]
+        except (OSError, model_client.ModelServerError) as e:
+            return {"state": "unavailable", "model": None, "engine": None, "error": str(e), "load_seconds": None}
+    return dict(_model_status)
+
+def is_model_ready() -> bool:
+    return summarizer is not None
+
+def wait_until_ready(timeout: Optional[float] = None) -> bool:
+    """Wait up to `timeout` seconds for loading to finish; True if the model is usable"""
+    _model_ready.wait(timeout)
+    return summarizer is not None
+
+def max_input_tokens() -> int:
+    """Size of the model's input window, less room for the special tokens and prompt prefix"""
+    tokenizer = summarizer.tokenizer
+    limit = tokenizer.model_max_length
+    positions = getattr(summarizer.model.config, "max_position_embeddings", None) or _model_spec["max_input_tokens"]
+    # model_max_length is a huge sentinel when the tokenizer doesn't define it
+    if not limit or limit > positions:
+        limit = positions
+    prefix_tokens = 0
+    if _model_spec["prefix"]:
+        prefix_tokens = len(tokenizer(_model_spec["prefix"], add_special_tokens=False)["input_ids"])
+    return limit - tokenizer.num_special_tokens_to_add() - prefix_tokens
+
+def chunk_text(text: str, max_tokens: Optional[int] = None) -> List[str]:
+    """
+    Split text into chunks that fit the model's input window, measured with the
+    model's own tokenizer and cut on sentence boundaries. A sentence longer than
+    the window is split on token boundaries.
+    """
+    tokenizer = summarizer.tokenizer
+    if max_tokens is None:
+        max_tokens = max_input_tokens()
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+    token_ids = tokenizer(sentences, add_special_tokens=False)["input_ids"]
+
+    chunks = []
+    current, current_tokens = [], 0
+    for sentence, ids in zip(sentences, token_ids):
+        # A leading space becomes part of the first token when sentences are rejoined
+        length = len(ids) + 1
+        if current and current_tokens + length > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        if length > max_tokens:
+            for start in range(0, len(ids), max_tokens):
+                chunks.append(tokenizer.decode(ids[start:start + max_tokens]).strip())
+            continue
+        current.append(sentence)
+        current_tokens += length
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def count_tokens(sentences: List[str]) -> List[int]:
+    """Token count of each sentence with the model's tokenizer"""
+    if not sentences:
+        return []
+    return [len(ids) for ids in summarizer.tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+
+def prepare_chunks(text: str) -> List[str]:
+    """Pre-filter the text (if enabled) and cut it into model-sized chunks"""
+    if SUMMARIZER_PREFILTER:
+        text = select_sentences(text, SUMMARIZER_PREFILTER_TOKENS, count_tokens)
+    return chunk_text(text)
+
+def generate_summaries(chunks: List[str], batch_size: Optional[int] = None) -> List[str]:
+    """
+    Summarize chunks with one batched pipeline call. If the batch fails, chunks
+    are retried one at a time so one bad chunk doesn't lose the others.
+    """
+    if not chunks:
+        return []
+    if batch_size is None:
+        batch_size = SUMMARIZER_BATCH_SIZE
+    options = dict(max_length=SUMMARY_MAX_LENGTH, min_length=SUMMARY_MIN_LENGTH, do_sample=False, truncation=True)
+    if _model_spec["prefix"]:
+        chunks = [_model_spec["prefix"] + chunk for chunk in chunks]
+    try:
+        outputs = summarizer(chunks, batch_size=batch_size, **options)
+        return [output["summary_text"] for output in outputs]
+    except Exception as e:
+        logger.error(f"Error summarizing batch of {len(chunks)} chunks: {e}")
+
+    summaries = []
+    for chunk in chunks:
+        try:
+            summaries.append(summarizer(chunk, **options)[0]["summary_text"])
+        except Exception as e:
+            logger.error(f"Error summarizing chunk: {e}")
+            summaries.append("Error summarizing part of the text.")
+    return summaries
+
+def _init_map_worker(model_name: str, engine: str):
+    """Load the model once in each map worker process"""
+    pipeline, _ = build_pipeline(engine, model_name)
+    use_pipeline(pipeline, model_name)
+
+def _get_map_executor():
+    """Return the map process pool, creating it on first use; None when disabled"""
+    global _map_executor
+    if SUMMARIZER_MAP_WORKERS <= 1 or _map_executor_failed:
+        return None
+    if _map_executor is None:
+        # Spawned workers only import this module and load the model in the initializer
+        _map_executor = ProcessPoolExecutor(
+            max_workers=SUMMARIZER_MAP_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_map_worker,
+            initargs=(_model_status["model"], _model_status["engine"]),
+        )
+    return _map_executor
+
+def map_chunks(chunks: List[str]) -> List[str]:
+    """
+    Summarize chunks, spread across the map process pool when
+    SUMMARIZER_MAP_WORKERS > 1, falling back to in-process batches
+    """
+    global _map_executor, _map_executor_failed
+    executor = _get_map_executor()
+    if executor is None or len(chunks) < 2:
+        return generate_summaries(chunks)
+    size = -(-len(chunks) // SUMMARIZER_MAP_WORKERS)
+    try:
+        parts = executor.map(generate_summaries, [chunks[i:i + size] for i in range(0, len(chunks), size)])
+        return [summary for part in parts for summary in part]
+    except Exception as e:
+        logger.error(f"Map worker pool failed, summarizing in-process from now on: {e}")
+        _map_executor_failed = True
+        executor.shutdown(wait=False)
+        _map_executor = None
+        return generate_summaries(chunks)
+
+def reduce_inputs(summaries: List[str]) -> Optional[List[str]]:
+    """
+    Inputs for the next reduce round of hierarchical summarization: all the
+    summaries joined if they fit one input window, otherwise consecutive groups
+    of at most SUMMARIZER_REDUCE_FAN_IN summaries that fit. None when there is
+    nothing left to reduce.
+    """
+    if len(summaries) <= 1:
+        return None
+    max_tokens = max_input_tokens()
+    lengths = [len(ids) + 1 for ids in summarizer.tokenizer(summaries, add_special_tokens=False)["input_ids"]]
+    if sum(lengths) <= max_tokens:
+        return [" ".join(summaries)]
+
+    groups = []
+    current, current_tokens = [], 0
+    for summary, length in zip(summaries, lengths):
+        if current and (len(current) >= SUMMARIZER_REDUCE_FAN_IN or current_tokens + length > max_tokens):
+            groups.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(summary)
+        current_tokens += length
+    groups.append(" ".join(current))
+    return groups
+
+def summarize_chunks(chunks: List[str]) -> str:
+    """
+    Map the chunks to summaries, then (in hierarchical mode) reduce them round
+    by round until a single summary remains or SUMMARIZER_MAX_REDUCE_DEPTH is hit
+    """
+    summaries = map_chunks(chunks)
+    for _ in range(SUMMARIZER_MAX_REDUCE_DEPTH if SUMMARIZER_HIERARCHICAL else 0):
+        inputs = reduce_inputs(summaries)
+        if inputs is None:
+            break
+        summaries = map_chunks(inputs)
+    return " ".join(summaries)
+
+def _unavailable_reason(text, ready: bool) -> Optional[str]:
+    """Why no summary can be generated, or None if the model can be used"""
     if not text or len(text.strip()) < 50:
         return "Text too short for summarization."
-    
-    if not summarizer:
-        return "Summarization model not loaded. Please check server logs."
-    
+    if not ready:
+        if _model_status["state"] == "failed":
+            return "Summarization model not loaded. Please check server logs."
+        return "The summarization model is still loading. Please try again shortly."
+    return None
+
+def extractive_fallback(text, reason: str) -> Tuple[str, Optional[str]]:
+    """
+    Summarize with the extractive engine when the model can't serve the
+    request; `reason` is returned instead if that produces nothing either
+    """
+    logger.info(f"Using extractive summary: {reason}")
+    try:
+        summary = extractive_summary(text, EXTRACTIVE_SUMMARY_SENTENCES)
+    except Exception as e:
+        logger.error(f"Error building extractive summary: {e}")
+        summary = ""
+    return (summary, "extractive") if summary else (reason, None)
+
+def summarize(text, wait: Optional[float] = None) -> Tuple[str, Optional[str]]:
+    """
+    Summarize the provided text.
+    Returns (summary, engine) where engine is "abstractive" (the model) or
+    "extractive" (the fallback used when the model is unavailable), or None
+    when no summary could be generated and `summary` explains why.
+    Waits up to `wait` seconds (defaults to SUMMARIZER_WAIT_SECONDS) for a model
+    that is still loading.
+    """
+    if not text or len(text.strip()) < 50:
+        return _unavailable_reason(text, False), None
+
+    if SUMMARIZER_SERVER_SOCKET:
+        try:
+            response = model_client.request(SUMMARIZER_SERVER_SOCKET, "summarize", text=text, wait=wait)
+            return response["summary"], response["engine"]
+        except (OSError, model_client.ModelServerError) as e:
+            logger.error(f"Model server request failed: {e}")
+            return extractive_fallback(text, "The summarization server is unavailable. Please check server logs.")
+
+    start_background_load()
+    reason = _unavailable_reason(text, wait_until_ready(SUMMARIZER_WAIT_SECONDS if wait is None else wait))
+    if reason:
+        return extractive_fallback(text, reason)
+
+    try:
+        return summarize_chunks(prepare_chunks(text)), "abstractive"
+    except Exception as e:
+        logger.error(f"Error summarizing text: {e}")
+        return extractive_fallback(text, f"Summarization error: {str(e)}")
+
+def start_batcher():
+    """Start the cross-request batching scheduler on the running event loop"""
+    global _batcher
+    if SUMMARIZER_SERVER_SOCKET:
+        # Requests are batched by the model server
+        return
+    if _batcher is None:
+        # With a map pool, each batch is spread across its workers
+        batch_size = SUMMARIZER_BATCH_SIZE * max(1, SUMMARIZER_MAP_WORKERS)
+        _batcher = MicroBatcher(map_chunks, batch_size, SUMMARIZER_BATCH_WAIT_MS, name="summarizer-batch")
+    _batcher.start()
+
+async def stop_batcher():
+    if _batcher is not None:
+        await _batcher.stop()
+    if _map_executor is not None:
+        _map_executor.shutdown(wait=False)
+
+def batcher_stats() -> Optional[dict]:
+    return _batcher.stats() if _batcher is not None else None
+
+async def summarize_async(text, wait: Optional[float] = None) -> Tuple[str, Optional[str]]:
+    """
+    Async version of summarize(). The document's chunks are submitted to the
+    batching scheduler, so chunks of concurrent uploads share forward passes
+    instead of each upload running its own generation. Falls back to
+    summarize() on a worker thread when the scheduler isn't running.
+    When more than SUMMARIZER_MAX_QUEUE_DEPTH chunks are already waiting, the
+    request is answered with an extractive summary instead of queueing.
+    """
+    loop = asyncio.get_running_loop()
+    if SUMMARIZER_SERVER_SOCKET and text and len(text.strip()) >= 50:
+        try:
+            response = await model_client.request_async(SUMMARIZER_SERVER_SOCKET, "summarize", text=text, wait=wait)
+            return response["summary"], response["engine"]
+        except (OSError, asyncio.TimeoutError, model_client.ModelServerError) as e:
+            logger.error(f"Model server request failed: {e}")
+            return await loop.run_in_executor(
+                None, extractive_fallback, text, "The summarization server is unavailable. Please check server logs."
+            )
+    if _batcher is None or not _batcher.running:
+        return await loop.run_in_executor(None, summarize, text, wait)
+    if not text or len(text.strip()) < 50:
+        return _unavailable_reason(text, False), None
+
+    if SUMMARIZER_MAX_QUEUE_DEPTH and _batcher.pending > SUMMARIZER_MAX_QUEUE_DEPTH:
+        return await loop.run_in_executor(
+            None, extractive_fallback, text, f"{_batcher.pending} chunks queued for the model"
+        )
+
+    start_background_load()
+    ready = await loop.run_in_executor(None, wait_until_ready, SUMMARIZER_WAIT_SECONDS if wait is None else wait)
+    reason = _unavailable_reason(text, ready)
+    if reason:
+        return await loop.run_in_executor(None, extractive_fallback, text, reason)
+
     try:
-        # Clean the text
-        cleaned_text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Chunk the text if it's too long
-        max_chunk_size = 1024  # Maximum tokens the model can handle
-        if len(cleaned_text) > max_chunk_size * 4:  # Rough character to token ratio
-            chunks = [cleaned_text[i:i+max_chunk_size*4] for i in range(0, len(cleaned_text), max_chunk_size*4)]
-            summaries = []
-            
-            for chunk in chunks:
-                try:
-                    summary = summarizer(chunk, max_length=150, min_length=30, do_sample=False)[0]['summary_text']
-                    summaries.append(summary)
-                except Exception as e:
-                    logger.error(f"Error summarizing chunk: {e}")
-                    summaries.append("Error summarizing part of the text.")
-            
-            result = " ".join(summaries)
-            return result
-        else:
-            summary = summarizer(cleaned_text, max_length=150, min_length=30, do_sample=False)[0]['summary_text']
-            return summary
+        chunks = await loop.run_in_executor(None, prepare_chunks, text)
+        summaries = await _batcher.submit(chunks)
+        # Reduce rounds go through the scheduler too, batched with other requests' chunks
+        for _ in range(SUMMARIZER_MAX_REDUCE_DEPTH if SUMMARIZER_HIERARCHICAL else 0):
+            inputs = await loop.run_in_executor(None, reduce_inputs, summaries)
+            if inputs is None:
+                break
+            summaries = await _batcher.submit(inputs)
+        return " ".join(summaries), "abstractive"
     except Exception as e:
         logger.error(f"Error summarizing text: {e}")
-        return f"Summarization error: {str(e)}"
\ No newline at end of file
+        return await loop.run_in_executor(None, extractive_fallback, text, f"Summarization error: {str(e)}")
+
+def _stream_generate(text: str) -> Iterator[str]:
+    """
+    Generate a summary of one model input and yield the text as tokens are
+    produced. Uses greedy decoding, since the streamer can't follow beam search.
+    Closing the generator stops the generation at the next token.
+    """
+    from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+    tokenizer = summarizer.tokenizer
+    inputs = tokenizer(_model_spec["prefix"] + text, return_tensors="pt", truncation=True)
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    stopped = threading.Event()
+    errors = []
+
+    class StopWhenClosed(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return stopped.is_set()
+
+    def generate():
+        try:
+            summarizer.model.generate(
+                **inputs, streamer=streamer, max_length=SUMMARY_MAX_LENGTH,
+                min_length=SUMMARY_MIN_LENGTH, num_beams=1, do_sample=False,
+                stopping_criteria=StoppingCriteriaList([StopWhenClosed()])
+            )
+        except Exception as e:
+            errors.append(e)
+            # Unblock the consumer, which would otherwise wait for tokens forever
+            streamer.end()
+
+    thread = threading.Thread(target=generate, name="summarizer-stream", daemon=True)
+    thread.start()
+    try:
+        for piece in streamer:
+            if piece:
+                yield piece
+    finally:
+        # Also reached when the consumer goes away part way through
+        stopped.set()
+    thread.join()
+    if errors:
+        raise errors[0]
+
+def iter_summary(text, wait: Optional[float] = None) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Summarize the text like summarize(), yielding (text, engine) pieces as the
+    summary is generated. Chunk summaries and all but the last reduce round
+    are produced first; the final generation is streamed token by token.
+    A fallback or error message is yielded as a single piece.
+    Like summarize_async(), requests get an extractive summary when more than
+    SUMMARIZER_MAX_QUEUE_DEPTH chunks are waiting for the model, or when no
+    SUMMARIZER_MAX_STREAMS slot frees up within the wait. Closing the
+    generator stops the model's generation.
+    """
+    if not text or len(text.strip()) < 50:
+        yield _unavailable_reason(text, False), None
+        return
+
+    if SUMMARIZER_SERVER_SOCKET:
+        streamed = False
+        try:
+            for response in model_client.iter_request(SUMMARIZER_SERVER_SOCKET, "stream", text=text, wait=wait):
+                streamed = True
+                yield response["piece"], response["engine"]
+        except (OSError, model_client.ModelServerError) as e:
+            logger.error(f"Model server stream failed: {e}")
+            if streamed:
+                raise
+            yield extractive_fallback(text, "The summarization server is unavailable. Please check server logs.")
+        return
+
+    if _batcher is not None and SUMMARIZER_MAX_QUEUE_DEPTH and _batcher.pending > SUMMARIZER_MAX_QUEUE_DEPTH:
+        yield extractive_fallback(text, f"{_batcher.pending} chunks queued for the model")
+        return
+
+    if wait is None:
+        wait = SUMMARIZER_WAIT_SECONDS
+    start_background_load()
+    reason = _unavailable_reason(text, wait_until_ready(wait))
+    if reason:
+        yield extractive_fallback(text, reason)
+        return
+
+    if _stream_slots is not None and not _stream_slots.acquire(timeout=wait):
+        yield extractive_fallback(text, f"{SUMMARIZER_MAX_STREAMS} summaries already streaming")
+        return
+    streamed = False
+    try:
+        inputs = prepare_chunks(text)
+        if SUMMARIZER_HIERARCHICAL and len(inputs) > 1:
+            summaries = map_chunks(inputs)
+            inputs = None
+            for _ in range(SUMMARIZER_MAX_REDUCE_DEPTH):
+                next_inputs = reduce_inputs(summaries)
+                if next_inputs is None or len(next_inputs) == 1:
+                    inputs = next_inputs
+                    break
+                summaries = map_chunks(next_inputs)
+            if inputs is None:
+                # Already reduced to one summary, or out of reduce rounds
+                yield " ".join(summaries), "abstractive"
+                return
+
+        for index, chunk in enumerate(inputs):
+            if index:
+                yield " ", "abstractive"
+            for piece in _stream_generate(chunk):
+                streamed = True
+                yield piece, "abstractive"
+    except Exception as e:
+        logger.error(f"Error streaming summary: {e}")
+        if streamed:
+            raise
+        yield extractive_fallback(text, f"Summarization error: {str(e)}")
+    finally:
+        if _stream_slots is not None:
+            _stream_slots.release()
+
+def summarize_text(text):
+    """Summarize the provided text"""
+    return summarize(text)[0]
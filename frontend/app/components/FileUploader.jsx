@@ -23,7 +23,8 @@ export default function FileUploader({ onProcessingComplete }) {
     try {
       setLoading(true);
       setError(null);
-      const result = await uploadFile(file);
+      // Ask for the summary to be streamed so the report shows up before it's generated
+      const result = await uploadFile(file, { streamSummary: true });
       onProcessingComplete(result);
     } catch (err) {
       setError("Error processing file. Please try again.");
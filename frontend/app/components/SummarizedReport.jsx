@@ -1,12 +1,60 @@
-export default function SummarizedReport({ summary }) {
-    if (!summary) return null;
+"use client";
+
+import { useEffect, useState } from "react";
+import { streamSummary } from "../services/api";
+
+export default function SummarizedReport({ summary, summaryEngine, summaryStream }) {
+    const [text, setText] = useState(summary || "");
+    const [engine, setEngine] = useState(summaryEngine);
+    const [streaming, setStreaming] = useState(false);
+    const [error, setError] = useState(null);
+    
+    useEffect(() => {
+      setText(summary || "");
+      setEngine(summaryEngine);
+      setError(null);
+      if (summary || !summaryStream) return;
+      
+      // Render the summary progressively as the model generates it
+      setStreaming(true);
+      const close = streamSummary(summaryStream, {
+        onToken: (piece) => setText((current) => current + piece),
+        onDone: (result) => {
+          setText(result.summary);
+          setEngine(result.summary_engine);
+          setStreaming(false);
+        },
+        onError: (err) => {
+          console.error("Error streaming summary:", err);
+          setError("The summary could not be completed. Please try uploading again.");
+          setStreaming(false);
+        },
+      });
+      return close;
+    }, [summary, summaryEngine, summaryStream]);
+    
+    if (!text && !streaming && !error) return null;
     
     return (
       <div className="w-full max-w-md mx-auto p-6 bg-white rounded-lg shadow-lg mt-6 border border-gray-200">
         <h2 className="text-xl font-bold mb-4 text-blue-700">Report Summary</h2>
         <div className="bg-gray-50 p-4 rounded-lg border-l-4 border-green-500">
-          <p className="text-gray-800 leading-relaxed">{summary}</p>
+          <p className="text-gray-800 leading-relaxed">
+            {text}
+            {streaming && <span className="inline-block w-2 h-4 ml-1 bg-gray-400 animate-pulse align-middle"></span>}
+          </p>
+          {streaming && !text && (
+            <p className="text-gray-500 text-sm">Generating summary...</p>
+          )}
         </div>
+        {engine === "extractive" && (
+          <p className="text-xs text-gray-500 mt-2">
+            Quick summary made of key sentences from your report; the AI summarizer was busy or unavailable.
+          </p>
+        )}
+        {error && (
+          <p className="text-sm text-red-600 mt-2">{error}</p>
+        )}
       </div>
     );
-  }
\ No newline at end of file
+  }
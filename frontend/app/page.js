@@ -31,7 +31,11 @@ export default function Home() {
         
         {processedData && (
           <div className="mt-8 space-y-8">
-            <SummarizedReport summary={processedData.summary} />
+            <SummarizedReport
+              summary={processedData.summary}
+              summaryEngine={processedData.summary_engine}
+              summaryStream={processedData.summary_stream}
+            />
             
             {/* Tab navigation */}
             <div className="border-b border-gray-200">
@@ -6,9 +6,13 @@ const API = axios.create({
 });
 
 // API functions
-export const uploadFile = async (file) => {
+export const uploadFile = async (file, { streamSummary = false } = {}) => {
   const formData = new FormData();
   formData.append("file", file);
+  if (streamSummary) {
+    // The summary is then streamed separately with streamSummary()
+    formData.append("stream_summary", "true");
+  }
   
   try {
     const response = await API.post("/upload/", formData);
@@ -23,6 +27,31 @@ export const uploadFile = async (file) => {
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 
+// Stream a report's summary over server-sent events as it is generated.
+// Returns a function that closes the stream.
+export const streamSummary = (streamPath, { onToken, onDone, onError }) => {
+  const source = new EventSource(`${API_BASE_URL}${streamPath}`);
+
+  source.addEventListener("token", (event) => {
+    onToken(JSON.parse(event.data).text);
+  });
+  source.addEventListener("done", (event) => {
+    source.close();
+    onDone(JSON.parse(event.data));
+  });
+  source.addEventListener("failed", (event) => {
+    source.close();
+    onError(new Error(JSON.parse(event.data).detail));
+  });
+  source.onerror = (error) => {
+    // Connection lost; don't let EventSource reconnect and regenerate the summary
+    source.close();
+    onError(error);
+  };
+
+  return () => source.close();
+};
+
 export const extractComplexTerms = async (text, reportId = null) => {
   try {
     const response = await API.post("/extract-complex-terms/", {